@@ -7,7 +7,10 @@ st.set_page_config(
 )
 
 from sdc.i18n import t
-from sdc.load import load_json
+from sdc.startup import prewarm_async
+
+# once per process: load data, compile rules and fill caches in the background
+prewarm_async()
 
 # -----------------------------
 # Global language toggle
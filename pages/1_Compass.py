@@ -2,34 +2,45 @@ import streamlit as st
 import plotly.graph_objects as go
 
 from sdc.i18n import t, opt
-from sdc.load import load_json
-from sdc.schema import Scenario
-from sdc.engine import evaluate
-from sdc.ui import flag_box
+from sdc.store import get_data
+from sdc.schema import ScenarioKey
+from sdc.ui import flag_box, ruleset_selector
+from sdc.batch import space_density
+from sdc.figures import compass_figure, density_trace
+from sdc.search import Constraints, neighbors, pareto
+from sdc.startup import prewarm_async
+
+# once per process: load data, compile rules and fill caches in the background
+prewarm_async()
 
 # -----------------------------
 # Global language toggle
 # -----------------------------
 lang = st.sidebar.radio("Langue / Language", ["FR", "EN"], index=0)
 
-RULES = load_json("data/rules.json")
-PRESETS = load_json("data/presets.json")
+DATA = get_data()
+RULESET = ruleset_selector(lang)
+RULES = RULESET.rules
+PRESETS = DATA.presets
 
-# --- NEW: normalize default scenario name + display helper ---
+# Scenario state: one ScenarioKey code per session, mirrored in the URL as ?s=<token>
+# so the view survives a refresh and can be bookmarked or shared. The preset name and
+# the reference view are derived from it.
 CUSTOM_NAME = "(custom)"
+PRESET_NONE = "__NONE__"
+DEFAULT_KEY = ScenarioKey.from_values({})
+PRESET_KEYS = {name: ScenarioKey.from_values(cfg) for name, cfg in PRESETS.items()}
 
-def normalize_scenario_name():
-    s = st.session_state.scenario
-    if (not s.get("name")) or (s.get("name") == "Untitled scenario"):
-        s["name"] = CUSTOM_NAME
-    st.session_state.scenario = s
+def preset_of(key: ScenarioKey) -> str:
+    return next((name for name, k in PRESET_KEYS.items() if k == key), PRESET_NONE)
 
-def display_scenario_name() -> str:
-    name = st.session_state.scenario.get("name", CUSTOM_NAME)
-    if name in PRESETS:
-        return opt(lang, "options.presets", name)
-    return opt(lang, "options.presets", CUSTOM_NAME)
-# --- END NEW ---
+def set_scenario(key: ScenarioKey) -> None:
+    st.session_state.scenario_code = key.code
+    if key == DEFAULT_KEY:
+        if "s" in st.query_params:
+            del st.query_params["s"]
+    elif st.query_params.get("s") != key.token:
+        st.query_params["s"] = key.token
 
 st.title(t(lang, "app.compass_title"))
 st.caption(
@@ -43,47 +54,16 @@ st.caption(
 # -----------------------------
 # Session state
 # -----------------------------
-if "scenario" not in st.session_state:
-    st.session_state.scenario = Scenario().model_dump()
-
-# NEW: normalize name right after init (prevents "Untitled scenario")
-normalize_scenario_name()
-
-# Force default/reset view to show reference only (no route/target)
-if "reference_view" not in st.session_state:
-    st.session_state.reference_view = True
-
-
-def apply_preset(name: str):
-    cfg = PRESETS[name]
-    s = st.session_state.scenario
-    s["name"] = name
-    for k, v in cfg.items():
-        s[k] = v
-    st.session_state.scenario = s
-    st.session_state.reference_view = False  # show route + target
-
-
-def reset_scenario():
-    st.session_state.scenario = Scenario().model_dump()
-    normalize_scenario_name()              # NEW
-    st.session_state.reference_view = True  # hide route + target
-
-
-
-# --- Reset coordination (MUST be before widgets that use these keys) ---
-if "do_reset" not in st.session_state:
-    st.session_state.do_reset = False
-
-# Apply reset BEFORE widgets are instantiated
-PRESET_NONE = "__NONE__"
-if st.session_state.do_reset:
-    reset_scenario()
-    st.session_state.preset_select = PRESET_NONE
-    st.session_state.last_preset = PRESET_NONE
-    st.session_state.do_reset = False
-
-
+try:
+    url_key = ScenarioKey.from_token(st.query_params.get("s", ""))
+except ValueError:
+    url_key = None
+if url_key is not None:
+    st.session_state.scenario_code = url_key.code  # a link or a refresh
+elif "scenario_code" not in st.session_state:
+    st.session_state.scenario_code = DEFAULT_KEY.code
+scenario = ScenarioKey.from_code(st.session_state.scenario_code)
+set_scenario(scenario)
 
 # Convenient order lists (stable)
 PATHS = ["A_REPAY", "B_RESTRUCTURE"]
@@ -98,16 +78,16 @@ SOCIALS = ["PROTECT", "NEUTRAL", "COMPRESS"]
 # -----------------------------
 top1, top2 = st.columns([4, 1], gap="small")
 
-# NOTE: use a stable internal token to avoid collisions with real preset names
-PRESET_NONE = "__NONE__"
 preset_options = [PRESET_NONE] + list(PRESETS.keys())
+active_preset = preset_of(scenario)
 
+# Widgets below have no key: their index follows the scenario code, so presets, reset
+# and links show through without extra session keys
 with top1:
     preset_name = st.selectbox(
         t(lang, "ui.scenario_preset"),
         preset_options,
-        index=0,
-        key="preset_select",
+        index=preset_options.index(active_preset),
         format_func=lambda k: (
             t(lang, "ui.scenario_preset_none", default="— Choose a preset —")
             if k == PRESET_NONE
@@ -117,19 +97,18 @@ with top1:
 
 with top2:
     if st.button(t(lang, "ui.reset"), use_container_width=True):
-        st.session_state.do_reset = True
+        set_scenario(DEFAULT_KEY)
         st.rerun()
 
-
 # Auto-apply preset
-if preset_name != PRESET_NONE and st.session_state.get("last_preset") != preset_name:
-    st.session_state.last_preset = preset_name
-    apply_preset(preset_name)
+if preset_name != PRESET_NONE and preset_name != active_preset:
+    set_scenario(PRESET_KEYS[preset_name])
     st.rerun()
 
 # Show active scenario name (display only, no input in V0)
+scenario_name = CUSTOM_NAME if active_preset == PRESET_NONE else active_preset
 st.caption(
-    f"{t(lang,'ui.scenario_active')}: **{display_scenario_name()}**"
+    f"{t(lang,'ui.scenario_active')}: **{opt(lang, 'options.presets', scenario_name)}**"
 )
 
 st.divider()
@@ -137,97 +116,35 @@ st.divider()
 # -----------------------------
 # SECOND ROW: Levers (horizontal)
 # -----------------------------
-c1, c2, c3, c4, c5, c6 = st.columns([1.4, 1.0, 1.2, 1.3, 1.3, 1.1], gap="small")
-sdict = st.session_state.scenario
-
-with c1:
-    new_val = st.selectbox(
-        t(lang, "ui.path"),
-        PATHS,
-        index=PATHS.index(sdict["path"]),
-        format_func=lambda x: opt(lang, "options.path", x),
-        key="lever_path",
-    )
-    if new_val != sdict["path"]:
-        st.session_state.reference_view = False
-    sdict["path"] = new_val
-
-with c2:
-    new_val = st.selectbox(
-        t(lang, "ui.timing"),
-        TIMINGS,
-        index=TIMINGS.index(sdict["timing"]),
-        format_func=lambda x: opt(lang, "options.timing", x),
-        key="lever_timing",
-    )
-    if new_val != sdict["timing"]:
-        st.session_state.reference_view = False
-    sdict["timing"] = new_val
-
-with c3:
-    new_val = st.selectbox(
-        t(lang, "ui.perimeter"),
-        PERIMETERS,
-        index=PERIMETERS.index(sdict["perimeter"]),
-        format_func=lambda x: opt(lang, "options.perimeter", x),
-        key="lever_perimeter",
-    )
-    if new_val != sdict["perimeter"]:
-        st.session_state.reference_view = False
-    sdict["perimeter"] = new_val
-
-with c4:
-    new_val = st.selectbox(
-        t(lang, "ui.fiscal_intensity"),
-        FISCALS,
-        index=FISCALS.index(sdict["fiscal_intensity"]),
-        format_func=lambda x: opt(lang, "options.fiscal_intensity", x),
-        key="lever_fiscal",
-    )
-    if new_val != sdict["fiscal_intensity"]:
-        st.session_state.reference_view = False
-    sdict["fiscal_intensity"] = new_val
-
-with c5:
-    new_val = st.selectbox(
-        t(lang, "ui.financing_mix"),
-        FIN_MIX,
-        index=FIN_MIX.index(sdict["financing_mix"]),
-        format_func=lambda x: opt(lang, "options.financing_mix", x),
-        key="lever_finmix",
-    )
-    if new_val != sdict["financing_mix"]:
-        st.session_state.reference_view = False
-    sdict["financing_mix"] = new_val
-
-with c6:
-    new_val = st.selectbox(
-        t(lang, "ui.social_priority"),
-        SOCIALS,
-        index=SOCIALS.index(sdict["social_priority"]),
-        format_func=lambda x: opt(lang, "options.social_priority", x),
-        key="lever_social",
-    )
-    if new_val != sdict["social_priority"]:
-        st.session_state.reference_view = False
-    sdict["social_priority"] = new_val
+LEVER_ROW = (
+    ("path", PATHS, 1.4),
+    ("timing", TIMINGS, 1.0),
+    ("perimeter", PERIMETERS, 1.2),
+    ("fiscal_intensity", FISCALS, 1.3),
+    ("financing_mix", FIN_MIX, 1.3),
+    ("social_priority", SOCIALS, 1.1),
+)
+values = scenario.values()
+for col, (lever, options, _) in zip(st.columns([w for *_, w in LEVER_ROW], gap="small"), LEVER_ROW):
+    with col:
+        values[lever] = st.selectbox(
+            t(lang, "ui." + lever),
+            options,
+            index=options.index(values[lever]),
+            format_func=lambda x, lever=lever: opt(lang, "options." + lever, x),
+        )
 
-st.session_state.scenario = sdict
+if ScenarioKey.from_values(values) != scenario:
+    set_scenario(ScenarioKey.from_values(values))
+    st.rerun()  # so the preset row above matches
 
 # -----------------------------
-# Build Scenario object + Evaluate
+# Evaluate: the code indexes the rule set's cached result table
 # -----------------------------
-scenario = Scenario(
-    name=st.session_state.scenario["name"],
-    path=st.session_state.scenario["path"],
-    timing=st.session_state.scenario["timing"],
-    perimeter=st.session_state.scenario["perimeter"],
-    fiscal_intensity=st.session_state.scenario["fiscal_intensity"],
-    financing_mix=st.session_state.scenario["financing_mix"],
-    social_priority=st.session_state.scenario["social_priority"],
-)
+# the default scenario shows the reference view (baseline only, no route/target)
+reference_view = scenario == DEFAULT_KEY
 
-res = evaluate(scenario, RULES)
+res = RULESET.table.get_key(scenario)
 fiscal = int(res["fiscal_stress"])
 social = int(res["social_stress"])
 zone = res["zone"]
@@ -319,71 +236,8 @@ st.caption(
 
 curr_xy = (fiscal, social)
 
-# Thresholds from rules
-z_rules = RULES["zones"]
-gxf = z_rules["green"]["max_fiscal"]
-gys = z_rules["green"]["max_social"]
-axf = z_rules["amber"]["max_fiscal"]
-ays = z_rules["amber"]["max_social"]
-
-fig = go.Figure()
-
-
-def shade(x0, y0, x1, y1, color):
-    fig.add_shape(
-        type="rect",
-        x0=x0,
-        y0=y0,
-        x1=x1,
-        y1=y1,
-        line=dict(width=0),
-        fillcolor=color,
-        layer="below",
-    )
-
-
-shade(0, 0, gxf, gys, "rgba(46, 204, 113, 0.14)")
-shade(gxf, 0, axf, gys, "rgba(241, 196, 15, 0.12)")
-shade(0, gys, gxf, ays, "rgba(241, 196, 15, 0.12)")
-shade(gxf, gys, axf, ays, "rgba(241, 196, 15, 0.12)")
-shade(axf, 0, 100, 100, "rgba(230, 126, 34, 0.10)")
-shade(0, ays, 100, 100, "rgba(230, 126, 34, 0.10)")
-shade(axf, ays, 100, 100, "rgba(231, 76, 60, 0.12)")
-
-grid_style = dict(width=2, color="rgba(60,60,60,0.65)", dash="dash")
-fig.add_shape(type="line", x0=gxf, y0=0, x1=gxf, y1=100, line=grid_style)
-fig.add_shape(type="line", x0=axf, y0=0, x1=axf, y1=100, line=grid_style)
-fig.add_shape(type="line", x0=0, y0=gys, x1=100, y1=gys, line=grid_style)
-fig.add_shape(type="line", x0=0, y0=ays, x1=100, y1=ays, line=grid_style)
-
-
-def midpt(a, b):
-    return (a + b) / 2
-
-
-xL, xM, xH = midpt(0, gxf), midpt(gxf, axf), midpt(axf, 100)
-yL, yM, yH = midpt(0, gys), midpt(gys, ays), midpt(ays, 100)
-
-grid_labels = [
-    (xL, yL, ("grid.viable", "Viable")),
-    (xM, yL, ("grid.austerity", "Austerity")),
-    (xH, yL, ("grid.fiscal_stress", "Fiscal stress")),
-    (xL, yM, ("grid.social_tension", "Social tension")),
-    (xM, yM, ("grid.fragile", "Fragile")),
-    (xH, yM, ("grid.high_risk", "High risk")),
-    (xL, yH, ("grid.social_stress", "Social stress")),
-    (xM, yH, ("grid.slowdown", "Slowdown")),
-    (xH, yH, ("grid.crisis", "Crisis zone")),
-]
-for x, y, (key, dflt) in grid_labels:
-    fig.add_annotation(
-        x=x,
-        y=y,
-        text=t(lang, key, default=dflt),
-        showarrow=False,
-        font=dict(size=13, color="rgba(20,20,20,0.90)"),
-        opacity=0.95,
-    )
+# Static zone background (cached per rules version + language)
+fig = compass_figure(RULES, RULESET.version, lang)
 
 # -----------------------------
 # Baseline pin + compass target (ONLY when not in reference view)
@@ -397,8 +251,58 @@ base_assumption = t(lang, b.get("assumption_key", "baseline.assumption"), defaul
 axis_f = t(lang, "axis.fiscal", default="Fiscal stress")
 axis_s = t(lang, "axis.social", default="Social/growth stress")
 
+# Whole decision space (WebGL, one marker per map position, from a cached batch)
+dc1, dc2 = st.columns([1, 2])
+show_space = dc1.checkbox(t(lang, "ui.density", default="Show the whole decision space"), key="density_show")
+space_color = dc2.radio(
+    t(lang, "ui.density_color", default="Color by"),
+    ["zone", "flags"],
+    format_func=lambda x: t(lang, f"ui.density_{x}", default=x),
+    horizontal=True,
+    key="density_color",
+    disabled=not show_space,
+)
+if show_space:
+    fig.add_trace(density_trace(space_density(RULESET.compiled), space_color, lang))
+
+# Pareto frontier overlay (optional constraints)
+pc1, pc2, pc3 = st.columns(3)
+show_front = pc1.checkbox(t(lang, "ui.pareto", default="Show Pareto frontier"), key="pareto_show")
+front_no_red = pc2.checkbox(t(lang, "ui.pareto_no_red", default="No RED flags"), key="pareto_no_red", disabled=not show_front)
+front_keep_path = pc3.checkbox(t(lang, "ui.pareto_keep_path", default="Keep current path"), key="pareto_keep_path", disabled=not show_front)
+
+if show_front:
+    cons = Constraints(
+        fixed=(("path", scenario.path),) if front_keep_path else (),
+        forbid_levels=("RED",) if front_no_red else (),
+    )
+    front = pareto(RULESET.compiled, cons)
+    hovers = []
+    for pt in front.points:
+        idx = pt.scenarios[0]
+        lines = [f"<b>{t(lang, 'ui.pareto_point', default='Pareto-optimal')}</b>", f"{axis_f}: {pt.fiscal_stress}/100", f"{axis_s}: {pt.social_stress}/100", ""]
+        lines += [
+            f"{t(lang, 'ui.' + lever, default=lever)}: {opt(lang, 'options.' + lever, RULESET.compiled.values[i][idx[i]])}"
+            for i, lever in enumerate(RULESET.compiled.levers)
+        ]
+        if len(pt.scenarios) > 1:
+            lines.append(t(lang, "ui.pareto_more", default="+{n} more scenario(s)").format(n=len(pt.scenarios) - 1))
+        hovers.append("<br>".join(lines))
+    fig.add_trace(
+        go.Scatter(
+            x=[pt.fiscal_stress for pt in front.points],
+            y=[pt.social_stress for pt in front.points],
+            mode="lines+markers",
+            line=dict(width=2, color="rgba(39,120,200,0.9)", shape="hv"),
+            marker=dict(size=9, color="rgba(39,120,200,0.9)"),
+            hovertemplate="%{customdata}<extra></extra>",
+            customdata=hovers,
+            name="Pareto",
+        )
+    )
+
 # Force reference view to show baseline point only (fix default + reset)
-if st.session_state.get("reference_view", False):
+if reference_view:
     curr_xy = base_xy
 
 show_delta = (curr_xy != base_xy)
@@ -436,7 +340,7 @@ if show_delta:
     )
 
     hover = (
-        f"<b>{opt(lang,'options.presets', scenario.name)}</b><br>"
+        f"<b>{opt(lang,'options.presets', scenario_name)}</b><br>"
         f"{axis_f}: {curr_xy[0]}/100<br>"
         f"{axis_s}: {curr_xy[1]}/100<br>"
         f"{zone_text}<br><br>"
@@ -460,14 +364,6 @@ if show_delta:
         )
     )
 
-fig.update_layout(
-    height=600,
-    margin=dict(l=45, r=45, t=10, b=45),
-    xaxis=dict(range=[0, 100], title=axis_f, zeroline=False),
-    yaxis=dict(range=[0, 100], title=axis_s, zeroline=False),
-    showlegend=False,
-)
-
 st.plotly_chart(fig, use_container_width=True)
 
 # Flags under the map (compact) — render here to guarantee full i18n
@@ -561,23 +457,29 @@ else:
 
     st.markdown(f"**{t(lang,'ui.what_to_change',default='What would change the result (V0 guidance)')}**")
 
-    tips = []
-    if scenario.timing == "DELAYED":
-        tips.append(t(lang, "tips.timing", default="Try an earlier timing (Immediate/Gradual) to reduce refinancing cliff risk."))
-    if scenario.financing_mix in ["UEMOA_HEAVY", "HIGH_INTEREST"]:
-        tips.append(t(lang, "tips.financing", default="Shift financing toward concessional-heavy to reduce stress and risk flags."))
-    if scenario.fiscal_intensity == "EXTREME":
-        tips.append(t(lang, "tips.fiscal", default="Reduce fiscal intensity (High/Moderate) to lower feasibility and social stress."))
-    if scenario.social_priority == "COMPRESS":
-        tips.append(t(lang, "tips.social", default="Protect social priority to reduce social risk and legitimacy stress."))
-    if scenario.perimeter == "EXTERNAL_PLUS_CFA_PARTIAL":
-        tips.append(t(lang, "tips.perimeter", default="Avoid including CFA-denominated debt if contagion risk is a binding constraint."))
-
-    if not tips:
-        tips.append(t(lang, "tips.none", default="Current configuration is internally coherent in V0. Compare against the alternative path to see trade-offs."))
-
-    for tip in tips[:4]:
-        st.markdown(f"- {tip}")
+    # Best single (or two-lever) changes, from the rule weights and flags
+    pairs = st.checkbox(t(lang, "tips.two_levers", default="Include two-lever changes"), key="tips_pairs")
+    suggestions = neighbors(RULESET.compiled, RULESET.compiled.indexes(scenario), pairs=pairs, limit=4)
+
+    if not suggestions:
+        st.markdown(f"- {t(lang, 'tips.none')}")
+
+    for sg in suggestions:
+        change = " + ".join(
+            f"{t(lang, 'ui.' + lever, default=lever)}: {opt(lang, 'options.' + lever, new)}"
+            for lever, _, new in sg.changes
+        )
+        effects = [
+            f"{t(lang, 'axis.fiscal', default='Fiscal stress')} {sg.d_fiscal:+d}",
+            f"{t(lang, 'axis.social', default='Social/growth stress')} {sg.d_social:+d}",
+        ]
+        if sg.zone_gain:
+            effects.append(t(lang, "zones." + sg.zone, default=sg.zone))
+        if sg.cleared:
+            effects.append(t(lang, "tips.clears", default="clears {n} flag(s)").format(n=len(sg.cleared)))
+        if sg.added:
+            effects.append(t(lang, "tips.adds", default="adds {n} flag(s)").format(n=len(sg.added)))
+        st.markdown(f"- **{change}** — {' · '.join(effects)}")
 
 # -----------------------------
 # OUTCOMES: 4 cards across bottom
@@ -1,15 +1,23 @@
+import pandas as pd
 import streamlit as st
 
 from sdc.i18n import t, opt
-from sdc.load import load_json
-from sdc.schema import Scenario
-from sdc.engine import evaluate
+from sdc.store import get_data
+from sdc.ui import ruleset_selector
+from sdc.schema import LEVERS, ScenarioKey
+from sdc.batch import cached_batch
+from sdc.startup import prewarm_async
+
+# once per process: load data, compile rules and fill caches in the background
+prewarm_async()
 
 # Global language toggle
 lang = st.sidebar.radio("Langue / Language", ["FR", "EN"], index=0)
 
-RULES = load_json("data/rules.json")
-PRESETS = load_json("data/presets.json")
+DATA = get_data()
+RULESET = ruleset_selector(lang)
+RULES = RULESET.rules
+PRESETS = DATA.presets
 
 st.title(t(lang, "app.compare_title"))
 st.caption(t(lang, "app.compare_caption"))
@@ -18,10 +26,6 @@ st.caption(t(lang, "app.compare_caption"))
 st.info(t(lang, "compare.disclaimer"))
 
 names = list(PRESETS.keys())
-if len(names) < 2:
-    # ✅ Use existing ui key you already have in FR/EN (you used it elsewhere)
-    st.error(t(lang, "ui.compare_need_two_presets"))
-    st.stop()
 
 # -----------------------------
 # Translation helpers (UI-side) — reuse Compass logic
@@ -67,54 +71,73 @@ def localize_flags(flags: list[dict]) -> list[dict]:
 
 
 # -----------------------------
-# Top selector row — enforce A != B
+# Scenario selection (presets, current Compass scenario, custom)
 # -----------------------------
-if "compare_left" not in st.session_state:
-    st.session_state.compare_left = names[0]
-if "compare_right" not in st.session_state:
-    st.session_state.compare_right = names[1] if len(names) > 1 else names[0]
-
-left_options = names
-right_options = [n for n in names if n != st.session_state.compare_left]
-if not right_options:
-    right_options = names
-
-sA_name, sB_name = st.columns([1, 1], gap="small")
-
-with sA_name:
-    left_name = st.selectbox(
-        t(lang, "ui.compare_selector_a"),
-        left_options,
-        index=left_options.index(st.session_state.compare_left),
-        key="compare_left",
-        format_func=lambda k: opt(lang, "options.presets", k),
-    )
-
-with sB_name:
-    if st.session_state.compare_right == left_name:
-        st.session_state.compare_right = next(n for n in names if n != left_name)
-
-    right_options = [n for n in names if n != left_name]
-    right_name = st.selectbox(
-        t(lang, "ui.compare_selector_b"),
-        right_options,
-        index=right_options.index(st.session_state.compare_right),
-        key="compare_right",
-        format_func=lambda k: opt(lang, "options.presets", k),
-    )
+CURRENT = "__current__"
+
+if "compare_custom" not in st.session_state:
+    st.session_state.compare_custom = []
+
+choices = {n: dict(PRESETS[n]) for n in names}
+if "scenario_code" in st.session_state:
+    choices[CURRENT] = ScenarioKey.from_code(st.session_state.scenario_code).values()
+for n, custom in enumerate(st.session_state.compare_custom, start=1):
+    choices[f"__custom_{n}__"] = custom
+
+def choice_label(k: str) -> str:
+    if k == CURRENT:
+        return t(lang, "compare.current", default="Current Compass scenario")
+    if k.startswith("__custom_"):
+        return t(lang, "compare.custom_name", default="Custom {n}").format(n=k[len("__custom_"):-2])
+    return opt(lang, "options.presets", k)
+
+if "compare_selected" not in st.session_state:
+    st.session_state.compare_selected = names[:2]
+# drop choices that no longer exist (e.g. custom scenarios removed); add a just-created one
+selected_now = [k for k in st.session_state.compare_selected if k in choices]
+added = st.session_state.pop("compare_added", None)
+if added in choices and added not in selected_now:
+    selected_now.append(added)
+st.session_state.compare_selected = selected_now
+
+selected = st.multiselect(
+    t(lang, "compare.select", default="Scenarios to compare"),
+    list(choices),
+    key="compare_selected",
+    format_func=choice_label,
+)
+
+with st.expander(t(lang, "compare.custom", default="Add a custom scenario")):
+    cols = st.columns(3, gap="small")
+    custom = {}
+    for i, (lever, values) in enumerate(LEVERS.items()):
+        with cols[i % 3]:
+            custom[lever] = st.selectbox(
+                t(lang, "ui." + lever, default=lever),
+                values,
+                format_func=lambda x, lever=lever: opt(lang, "options." + lever, x),
+                key=f"compare_custom_{lever}",
+            )
+    b1, b2 = st.columns(2, gap="small")
+    if b1.button(t(lang, "compare.custom_add", default="Add to comparison")):
+        st.session_state.compare_custom.append(custom)
+        st.session_state.compare_added = f"__custom_{len(st.session_state.compare_custom)}__"
+        st.rerun()
+    if st.session_state.compare_custom and b2.button(t(lang, "compare.custom_clear", default="Remove custom scenarios")):
+        st.session_state.compare_custom = []
+        st.rerun()
+
+if len(selected) < 2:
+    st.info(t(lang, "compare.need_two", default="Select at least two scenarios to compare."))
+    st.stop()
 
 # -----------------------------
-# Build scenarios + evaluate
+# Evaluate all selected scenarios in one cached batch
 # -----------------------------
-sA = Scenario(name=left_name, **PRESETS[left_name])
-sB = Scenario(name=right_name, **PRESETS[right_name])
-
-rA = evaluate(sA, RULES)
-rB = evaluate(sB, RULES)
-
-# Localize flags once (important: no English in FR)
-rA_flags = localize_flags(rA.get("flags", []))
-rB_flags = localize_flags(rB.get("flags", []))
+keys = [ScenarioKey.from_values(choices[k]) for k in selected]
+batch = cached_batch(RULESET.compiled, tuple(RULESET.compiled.indexes(k) for k in keys))
+results = [batch.result(i) for i in range(len(selected))]
+labels = [choice_label(k) for k in selected]
 
 st.divider()
 
@@ -176,59 +199,69 @@ def flags_block(flags: list[dict]):
 
 
 # -----------------------------
-# Two-column comparison
+# Difference matrix
 # -----------------------------
-left_col, right_col = st.columns(2, gap="large")
-
-with left_col:
-    st.subheader(f"A — {opt(lang,'options.presets', left_name)}")
-    st.markdown(f"**{t(lang,'ui.zone')}:** {zone_badge(rA['zone'])}")
-
-    # ✅ Remove EN default; use your existing ui.compare_position_fmt
-    st.caption(
-        f"{t(lang,'ui.compare_position')}: "
-        + t(lang, "ui.compare_position_fmt").format(fiscal=rA["fiscal_stress"], social=rA["social_stress"])
-    )
-
-    st.markdown(f"### {t(lang, 'ui.outcomes')}")
-    outcome_grid(rA["outcomes"])
+st.subheader(t(lang, "compare.matrix", default="Difference matrix"))
+st.caption(t(lang, "compare.matrix_caption", default="Highlighted rows are where the selected scenarios disagree."))
+
+compiled = RULESET.compiled
+rows = {t(lang, "ui.zone"): [zone_badge(r["zone"]) for r in results]}
+rows[t(lang, "axis.fiscal")] = [r["fiscal_stress"] for r in results]
+rows[t(lang, "axis.social")] = [r["social_stress"] for r in results]
+for name in compiled.outcome_names:
+    rows[t(lang, f"outcomes.{name}", default=name)] = [tr_outcome(name, r["outcomes"].get(name, "N/A")) for r in results]
+flag_cols = batch.flags[: len(selected)]
+for f, flag in enumerate(compiled.flags):
+    if not flag_cols[:, f].any():
+        continue  # not triggered by any selected scenario
+    title = localize_flags([flag])[0]["title"]
+    for p in ["🟠 ", "🔴 ", "⚠️ "]:
+        title = title[len(p):] if title.startswith(p) else title
+    prefix = "🔴" if flag.get("level") == "RED" else "🟠"
+    rows[f"{prefix} {title}"] = [
+        t(lang, "compare.flag_on", default="✔") if on else t(lang, "compare.flag_off", default="—")
+        for on in flag_cols[:, f]
+    ]
+
+# columns must be unique for the table; repeated selections get a suffix
+columns = [lbl if labels.index(lbl) == i else f"{lbl} ({i + 1})" for i, lbl in enumerate(labels)]
+matrix = pd.DataFrame.from_dict(rows, orient="index", columns=columns).astype(str)
+differs = matrix.nunique(axis=1) > 1
+
+if st.checkbox(t(lang, "compare.only_diff", default="Only rows that differ"), key="compare_only_diff"):
+    matrix = matrix[differs]
+    differs = differs[differs]
+
+highlight = "background-color: rgba(241, 196, 15, 0.25)"
+st.dataframe(
+    matrix.style.apply(lambda row: [highlight if differs[row.name] else ""] * len(row), axis=1),
+    use_container_width=True,
+)
 
-    st.markdown(f"### {t(lang, 'ui.risk_flags')}")
-    flags_block(rA_flags)
-
-with right_col:
-    st.subheader(f"B — {opt(lang,'options.presets', right_name)}")
-    st.markdown(f"**{t(lang,'ui.zone')}:** {zone_badge(rB['zone'])}")
+st.divider()
 
-    st.caption(
-        f"{t(lang,'ui.compare_position')}: "
-        + t(lang, "ui.compare_position_fmt").format(fiscal=rB["fiscal_stress"], social=rB["social_stress"])
-    )
+# -----------------------------
+# Per-scenario details
+# -----------------------------
+st.subheader(t(lang, "compare.details", default="Details"))
 
-    st.markdown(f"### {t(lang, 'ui.outcomes')}")
-    outcome_grid(rB["outcomes"])
+for tab, label, r in zip(st.tabs(columns), labels, results):
+    with tab:
+        st.markdown(f"**{t(lang,'ui.zone')}:** {zone_badge(r['zone'])}")
+        st.caption(
+            f"{t(lang,'ui.compare_position')}: "
+            + t(lang, "ui.compare_position_fmt").format(fiscal=r["fiscal_stress"], social=r["social_stress"])
+        )
 
-    st.markdown(f"### {t(lang, 'ui.risk_flags')}")
-    flags_block(rB_flags)
+        st.markdown(f"### {t(lang, 'ui.outcomes')}")
+        outcome_grid(r["outcomes"])
 
-st.divider()
+        st.markdown(f"### {t(lang, 'ui.risk_flags')}")
+        flags_block(localize_flags(r.get("flags", [])))
 
-# -----------------------------
-# Meeting prompts
-# -----------------------------
-st.subheader(t(lang, "ui.assumptions_risks"))
-st.caption(t(lang, "ui.placeholders_note"))
-
-p1, p2 = st.columns(2, gap="large")
-
-with p1:
-    with st.container(border=True):
-        st.markdown(f"**{t(lang,'ui.compare_selector_a')}: {opt(lang,'options.presets', left_name)}**")
-        st.markdown(f"- {t(lang,'compare.prompt_true')}")
-        st.markdown(f"- {t(lang,'compare.prompt_risk')}")
-
-with p2:
-    with st.container(border=True):
-        st.markdown(f"**{t(lang,'ui.compare_selector_b')}: {opt(lang,'options.presets', right_name)}**")
-        st.markdown(f"- {t(lang,'compare.prompt_true')}")
-        st.markdown(f"- {t(lang,'compare.prompt_risk')}")
+        # Meeting prompts
+        with st.container(border=True):
+            st.markdown(f"**{t(lang, 'ui.assumptions_risks')}** — {label}")
+            st.caption(t(lang, "ui.placeholders_note"))
+            st.markdown(f"- {t(lang,'compare.prompt_true')}")
+            st.markdown(f"- {t(lang,'compare.prompt_risk')}")
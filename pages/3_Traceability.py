@@ -1,14 +1,25 @@
 import streamlit as st
 
 from sdc.i18n import t
-from sdc.load import load_json
+from sdc.store import STORE, get_data
+from sdc.trace_file import StaleTraceError
+from sdc.trace_index import get_index
+from sdc.startup import prewarm_async
+
+# once per process: load data, compile rules and fill caches in the background
+prewarm_async()
+
+# Cards per page of results
+PAGE_SIZE = 10
 
 # -----------------------------
 # Global language toggle
 # -----------------------------
 lang = st.sidebar.radio("Langue / Language", ["FR", "EN"], index=0)
 
-TRACE = load_json("data/traceability.json")
+DATA = get_data()
+FLAGS = {f["id"]: f for f in DATA.rules.get("flags", [])}
+INDEX = get_index(DATA.trace, DATA.version, FLAGS)
 
 # -----------------------------
 # Page header
@@ -58,11 +69,68 @@ mode = st.radio(
 st.divider()
 
 # -----------------------------
-# Anchors cards
+# Search + filters (inverted index built once per data version)
 # -----------------------------
-anchors = TRACE.get("anchors", [])
+def flag_title(fid: str) -> str:
+    return t(lang, f"flags.{fid.lower()}.title", default=FLAGS.get(fid, {}).get("title", fid))
 
-for a in anchors:
+query = st.text_input(
+    t(lang, "trace.search", default="Search the report foundations"),
+    placeholder=t(lang, "trace.search_placeholder", default="e.g. échéances, FMI, refinancing…"),
+    key="trace_query",
+)
+f1, f2, f3 = st.columns(3, gap="small")
+with f1:
+    tag_filter = st.multiselect(t(lang, "trace.tags_filter", default="Tags"), sorted(INDEX.tags), key="trace_tags")
+with f2:
+    page_filter = st.selectbox(
+        t(lang, "trace.page_filter", default="Report page"),
+        [None] + INDEX.pages(),
+        format_func=lambda p: t(lang, "trace.page_any", default="All pages") if p is None else f"p. {p}",
+        key="trace_page",
+    )
+with f3:
+    flag_filter = st.selectbox(
+        t(lang, "trace.flag_filter", default="Justifies flag"),
+        [None] + sorted(INDEX.flag_anchors),
+        format_func=lambda f: t(lang, "trace.flag_any", default="All flags") if f is None else flag_title(f),
+        key="trace_flag",
+    )
+
+hits = INDEX.search(query, tags=tag_filter, page=page_filter, flag=flag_filter)
+anchors = INDEX.summaries
+st.caption(t(lang, "trace.results", default="{n} of {total} item(s) match.").format(n=len(hits), total=len(anchors)))
+if not hits:
+    st.info(t(lang, "trace.no_results", default="No item matches this search."))
+
+# Only one page of cards is built per rerun
+n_pages = max(1, -(-len(hits) // PAGE_SIZE))
+if st.session_state.get("trace_page_no", 1) > n_pages:
+    st.session_state.trace_page_no = n_pages  # fewer results than before
+page_no = 1
+if n_pages > 1:
+    page_no = st.number_input(
+        t(lang, "trace.page_no", default="Page (of {n})").format(n=n_pages),
+        min_value=1,
+        max_value=n_pages,
+        step=1,
+        key="trace_page_no",
+    )
+page_hits = hits[(page_no - 1) * PAGE_SIZE: page_no * PAGE_SIZE]
+
+# anchor id -> flags it justifies
+justifies = {}
+for fid, ids in INDEX.flag_anchors.items():
+    for aid in ids:
+        justifies.setdefault(aid, []).append(fid)
+
+st.divider()
+
+# -----------------------------
+# Anchors cards
+# -----------------------------
+for hit in page_hits:
+    a = anchors[hit.anchor]
     with st.container(border=True):
         left, right = st.columns([3, 1], gap="large")
 
@@ -79,26 +147,26 @@ for a in anchors:
                 else:
                     st.info(t(lang, "trace.no_refs", default="No references listed yet (V0)."))
 
-            # V1: citation-grade excerpts
+            # V1: citation-grade excerpts, read from the file only when shown
             else:
-                cits = a.get("citations", [])
-                if cits:
-                    st.markdown(f"**{t(lang, 'trace.citations_label', default='Citations (V1)')}**")
-
-                    for i, c in enumerate(cits, start=1):
-                        page = c.get("page", "?")
-                        quote_fr = (c.get("quote_fr", "") or "").strip()
-
-                        # Optional EN support if you later add quote_en
-                        quote_en = (c.get("quote_en", "") or "").strip()
-                        quote = quote_fr if lang == "FR" else (quote_en or quote_fr)
-
-                        label = t(
-                            lang,
-                            "trace.citation_item",
-                            default=f"Citation {i} — p. {page}",
-                        )
-                        with st.expander(f"{label}"):
+                if hit.citations:
+                    label = t(lang, "trace.citations_toggle", default="Citations (V1): {n}").format(n=len(hit.citations))
+                    if st.toggle(label, key=f"trace_cite_{a['id']}"):
+                        try:
+                            all_cits = INDEX.citations(hit.anchor)
+                        except StaleTraceError:
+                            STORE.invalidate()
+                            st.rerun()
+                        for i in hit.citations:
+                            c = all_cits[i]
+                            page = c.get("page", "?")
+                            quote_fr = (c.get("quote_fr", "") or "").strip()
+
+                            # Optional EN support if you later add quote_en
+                            quote_en = (c.get("quote_en", "") or "").strip()
+                            quote = quote_fr if lang == "FR" else (quote_en or quote_fr)
+
+                            st.markdown(f"**{t(lang, 'trace.citation_item', default=f'Citation {i + 1} — p. {page}')}**")
                             st.markdown(f"_{quote}_")
                 else:
                     st.warning(
@@ -118,6 +186,12 @@ for a in anchors:
                 st.markdown(f"**{t(lang, 'trace.tags_label', default='Tags')}**")
                 st.write(" · ".join(tags))
 
+            flags = justifies.get(a.get("id", ""), [])
+            if flags:
+                st.markdown(f"**{t(lang, 'trace.flags_label', default='Justifies flags')}**")
+                for fid in flags:
+                    st.markdown(f"- {flag_title(fid)}")
+
 st.divider()
 
 # -----------------------------
@@ -0,0 +1,204 @@
+from __future__ import annotations
+import math
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from .compiler import ZONES, CompiledRules
+
+# Coverage of a rule set over its whole lever space, without evaluating each scenario:
+#   zones / clamps: scoring is additive, so the joint (fiscal, social) distribution of
+#                   the space is the convolution of one small histogram per lever;
+#   flags:          a flag fires on every combination of the levers its 'when' leaves free;
+#   outcomes:       first matches are counted over the levers the outcome reads (directly
+#                   or through its flags) and scaled by the rest of the space.
+
+# Outcomes reading more lever combinations than this are not broken down per clause
+MAX_OUTCOME_CELLS = 1 << 22
+
+class ClauseCoverage(NamedTuple):
+    logic: int        # index in the outcome's logic list
+    label: str
+    first: int        # scenarios where this clause is the first match
+
+class OutcomeCoverage(NamedTuple):
+    name: str
+    clauses: Tuple[ClauseCoverage, ...]
+    default: int      # scenarios falling through to the default
+    labels: Mapping[str, int]
+    skipped: bool     # too many lever combinations to break down
+
+class Analysis(NamedTuple):
+    space: int
+    zones: Mapping[str, int]
+    clamped: Mapping[str, int]        # fiscal_low, fiscal_high, social_low, social_high, any
+    raw_range: Tuple[Tuple[Any, Any], Tuple[Any, Any]]  # unclamped (min, max) fiscal, social
+    flags: Mapping[str, int]          # flag id -> scenarios where it fires
+    outcomes: Tuple[OutcomeCoverage, ...]
+    equivalent: Tuple[Tuple[str, ...], ...]  # groups of presets with identical results
+    invalid_presets: Mapping[str, str]
+    diagnostics: Tuple[str, ...]
+
+    @property
+    def never_fire(self) -> List[str]:
+        return [f for f, n in self.flags.items() if n == 0]
+
+    @property
+    def always_fire(self) -> List[str]:
+        return [f for f, n in self.flags.items() if n == self.space]
+
+    @property
+    def dead_clauses(self) -> List[Tuple[str, ClauseCoverage]]:
+        return [(o.name, cl) for o in self.outcomes if not o.skipped for cl in o.clauses if cl.first == 0]
+
+def _space(c: CompiledRules) -> int:
+    return math.prod(c.sizes)
+
+def score_histogram(c: CompiledRules) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(fiscal_raw, social_raw, count) over the whole space, one entry per distinct pair."""
+    weights = sum(c.fiscal_w + c.social_w, ())
+    if all(float(w).is_integer() for w in weights):
+        # dense grid, shifted and added once per distinct (fiscal, social) weight of each lever
+        grid = np.ones((1, 1), dtype=object if _space(c) >= 1 << 62 else np.int64)
+        off_f, off_s = int(c.base_fiscal), int(c.base_social)
+        for fw, sw in zip(c.fiscal_w, c.social_w):
+            fw, sw = [int(w) for w in fw], [int(w) for w in sw]
+            mf, ms = min(fw), min(sw)
+            nxt = np.zeros((grid.shape[0] + max(fw) - mf, grid.shape[1] + max(sw) - ms), dtype=grid.dtype)
+            for (df, ds), n in Counter(zip(fw, sw)).items():
+                nxt[df - mf: df - mf + grid.shape[0], ds - ms: ds - ms + grid.shape[1]] += grid * n
+            grid, off_f, off_s = nxt, off_f + mf, off_s + ms
+        f, s = np.nonzero(grid)
+        return f + off_f, s + off_s, grid[f, s]
+    hist: Dict[Tuple[Any, Any], int] = {(c.base_fiscal, c.base_social): 1}
+    for fw, sw in zip(c.fiscal_w, c.social_w):
+        nxt: Dict[Tuple[Any, Any], int] = defaultdict(int)
+        steps = Counter(zip(fw, sw))
+        for (f, s), n in hist.items():
+            for (df, ds), m in steps.items():
+                nxt[(f + df, s + ds)] += n * m
+        hist = nxt
+    keys = list(hist)
+    return (
+        np.array([k[0] for k in keys]),
+        np.array([k[1] for k in keys]),
+        np.array([hist[k] for k in keys], dtype=object),
+    )
+
+def _outcome_coverage(c: CompiledRules, o: int, space: int) -> OutcomeCoverage:
+    name = c.outcome_names[o]
+    _, _, _, _, plan, default = c._decision_tables[o]
+    at = c._clause_at[o]
+    whens = [
+        (() if bit is None else c._flag_when[bit.bit_length() - 1], cond)
+        for bit, cond, _ in plan
+    ]
+    levers = sorted({i for when, cond in whens for i, _ in (*when, *(cond or ()))})
+    cells = math.prod(c.sizes[i] for i in levers)
+    if cells > MAX_OUTCOME_CELLS:
+        return OutcomeCoverage(name, (), 0, {}, True)
+    scale = space // cells
+    pos = {i: k for k, i in enumerate(levers)}
+    idx = np.indices([c.sizes[i] for i in levers]).reshape(len(levers), -1) if levers else np.zeros((0, 1), dtype=int)
+
+    def holds(conds: Sequence[Tuple[int, int]]) -> np.ndarray:
+        m = np.ones(idx.shape[1], dtype=bool)
+        for i, j in conds:
+            m &= idx[pos[i]] == j
+        return m
+
+    taken = np.zeros(idx.shape[1], dtype=bool)
+    clauses = []
+    labels: Dict[str, int] = defaultdict(int)
+    for (bit, cond, lbl), (when, _), m in zip(plan, whens, at):
+        hit = np.zeros(idx.shape[1], dtype=bool)
+        if bit is not None:
+            hit |= holds(when)
+        if cond is not None:
+            hit |= holds(cond)
+        first = int((hit & ~taken).sum()) * scale
+        taken |= hit
+        clauses.append(ClauseCoverage(m, lbl, first))
+        labels[lbl] += first
+    rest = int((~taken).sum()) * scale
+    if rest:
+        labels[default] += rest
+    return OutcomeCoverage(name, tuple(clauses), rest, dict(labels), False)
+
+def analyze(c: CompiledRules, presets: Optional[Mapping[str, Mapping[str, Any]]] = None) -> Analysis:
+    space = _space(c)
+    f, s, n = score_histogram(c)
+    fc, sc = np.clip(f, 0, 100), np.clip(s, 0, 100)
+    (gf, gs), (af, as_) = c.zone_limits
+    green = (fc <= gf) & (sc <= gs)
+    amber = ~green & (fc <= af) & (sc <= as_)
+    zones = {"GREEN": int(n[green].sum()), "AMBER": int(n[amber].sum()), "RED": int(n[~green & ~amber].sum())}
+    clamped = {
+        "fiscal_low": int(n[f < 0].sum()),
+        "fiscal_high": int(n[f > 100].sum()),
+        "social_low": int(n[s < 0].sum()),
+        "social_high": int(n[s > 100].sum()),
+        "any": int(n[(f != fc) | (s != sc)].sum()),
+    }
+
+    flags = {
+        flag["id"]: space // math.prod(c.sizes[i] for i, _ in when)
+        for flag, when in zip(c.flags, c._flag_when)
+    }
+    outcomes = tuple(_outcome_coverage(c, o, space) for o in range(len(c.outcome_names)))
+
+    groups: Dict[Any, List[str]] = defaultdict(list)
+    invalid: Dict[str, str] = {}
+    for pname, values in (presets or {}).items():
+        try:
+            r = c.evaluate(_Values(values))
+        except ValueError as e:
+            invalid[pname] = str(e)
+            continue
+        key = (r["fiscal_stress"], r["social_stress"], r["zone"],
+               tuple(fl["id"] for fl in r["flags"]), tuple(r["outcomes"].items()))
+        groups[key].append(pname)
+
+    return Analysis(
+        space=space,
+        zones=zones,
+        clamped=clamped,
+        raw_range=((f.min().item(), f.max().item()), (s.min().item(), s.max().item())),
+        flags=flags,
+        outcomes=outcomes,
+        equivalent=tuple(tuple(g) for g in groups.values() if len(g) > 1),
+        invalid_presets=invalid,
+        diagnostics=tuple(c.diagnostics),
+    )
+
+class _Values:
+    # preset mapping read like a Scenario
+    def __init__(self, values: Mapping[str, Any]):
+        self._values = values
+
+    def __getattr__(self, lever: str) -> Any:
+        if lever not in self._values:
+            raise ValueError(f"missing lever '{lever}'")
+        return self._values[lever]
+
+def verify(c: CompiledRules, a: Analysis) -> List[str]:
+    """Cross-check an analysis against a brute-force batch over the space (batch.MAX_SPACE cells at most)."""
+    from .batch import space_batch
+
+    b = space_batch(c)
+    out = []
+    zones = {z: int((b.zone == k).sum()) for k, z in enumerate(ZONES)}
+    if zones != dict(a.zones):
+        out.append(f"zones: {dict(a.zones)} != {zones}")
+    for k, flag in enumerate(c.flags):
+        n = int(b.flags[:, k].sum())
+        if n != a.flags[flag["id"]]:
+            out.append(f"flag {flag['id']}: {a.flags[flag['id']]} != {n}")
+    for oc in a.outcomes:
+        if oc.skipped:
+            continue
+        for label, n in oc.labels.items():
+            col = b.outcome_columns.index((oc.name, label))
+            got = int(b.outcomes[:, col].sum())
+            if got != n:
+                out.append(f"outcome {oc.name}={label}: {n} != {got}")
+    return out
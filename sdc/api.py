@@ -0,0 +1,209 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from pydantic import ValidationError
+from .load import thaw
+from .schema import Scenario
+from .startup import prewarm
+from .store import DataSnapshot, get_data
+from .table import get_table
+
+# Headless evaluation API: a plain ASGI app (no framework, no Streamlit).
+#   GET  /health            -> {"status": "ok"}
+#   GET  /rules/version     -> rules + data versions
+#   POST /evaluate          -> one scenario in, one evaluate() result out
+#   POST /evaluate/batch    -> {"scenarios": [...]} in, {"results": [...]} out
+
+MAX_BATCH = 5000
+MAX_BODY = 8 * 1024 * 1024
+
+class HTTPError(Exception):
+    def __init__(self, status: int, detail: Any):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+def _scenario(obj: Any) -> Scenario:
+    if not isinstance(obj, dict):
+        raise ValueError("expected a JSON object")
+    return Scenario.model_validate(obj)
+
+def _validation_detail(e: Exception) -> Any:
+    if isinstance(e, ValidationError):
+        return json.loads(e.json(include_url=False))
+    return str(e)
+
+def _evaluate_one(body: Any, data: DataSnapshot) -> Dict[str, Any]:
+    try:
+        s = _scenario(body)
+    except (ValueError, ValidationError) as e:
+        raise HTTPError(422, _validation_detail(e))
+    return thaw(get_table(data.rules, data.rules_version).get(s))
+
+def _evaluate_batch(body: Any, data: DataSnapshot) -> Dict[str, Any]:
+    items = body.get("scenarios") if isinstance(body, dict) else body
+    if not isinstance(items, list):
+        raise HTTPError(422, "expected {\"scenarios\": [...]} or a JSON list")
+    if len(items) > MAX_BATCH:
+        raise HTTPError(413, f"at most {MAX_BATCH} scenarios per request")
+    table = get_table(data.rules, data.rules_version)
+    results, errors = [], []
+    for i, obj in enumerate(items):
+        try:
+            results.append(thaw(table.get(_scenario(obj))))
+        except (ValueError, ValidationError) as e:
+            errors.append({"index": i, "detail": _validation_detail(e)})
+    if errors:
+        raise HTTPError(422, errors)
+    return {"count": len(results), "results": results}
+
+def _health(_: Any, data: DataSnapshot) -> Dict[str, Any]:
+    return {"status": "ok"}
+
+def _version(_: Any, data: DataSnapshot) -> Dict[str, Any]:
+    return {"rules_version": data.rules_version, "data_version": data.version}
+
+ROUTES: Dict[Tuple[str, str], Callable[[Any, DataSnapshot], Dict[str, Any]]] = {
+    ("GET", "/health"): _health,
+    ("GET", "/rules/version"): _version,
+    ("POST", "/evaluate"): _evaluate_one,
+    ("POST", "/evaluate/batch"): _evaluate_batch,
+}
+
+async def _read_body(receive: Callable[[], Awaitable[Dict[str, Any]]]) -> bytes:
+    chunks, size = [], 0
+    while True:
+        msg = await receive()
+        if msg["type"] == "http.disconnect":
+            break
+        chunk = msg.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY:
+            raise HTTPError(413, "request body too large")
+        chunks.append(chunk)
+        if not msg.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+async def _send(send, status: int, payload: Any = None, headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+    body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    hdrs = list(headers or [])
+    if payload is not None:
+        hdrs.append((b"content-type", b"application/json; charset=utf-8"))
+    hdrs.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": hdrs})
+    await send({"type": "http.response.body", "body": body})
+
+async def app(scope: Dict[str, Any], receive, send) -> None:
+    if scope["type"] == "lifespan":
+        while True:
+            msg = await receive()
+            if msg["type"] == "lifespan.startup":
+                prewarm()
+                await send({"type": "lifespan.startup.complete"})
+            elif msg["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    method, path = scope["method"], scope["path"].rstrip("/") or "/"
+    handler = ROUTES.get((method, path))
+    try:
+        if handler is None:
+            if any(p == path for _, p in ROUTES):
+                raise HTTPError(405, "method not allowed")
+            raise HTTPError(404, "not found")
+        raw = await _read_body(receive)
+        data = get_data()
+
+        # same data version + same request -> same response
+        etag = f'"{data.version}-{hashlib.sha256(method.encode() + path.encode() + raw).hexdigest()[:16]}"'
+        headers = [(b"etag", etag.encode()), (b"x-rules-version", data.rules_version.encode())]
+        req_headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        if req_headers.get("if-none-match") == etag:
+            await _send(send, 304, None, headers)
+            return
+
+        body = None
+        if method == "POST":
+            try:
+                body = json.loads(raw.decode("utf-8-sig") or "null")
+            except ValueError:
+                raise HTTPError(400, "invalid JSON body")
+        payload = handler(body, data)
+    except HTTPError as e:
+        await _send(send, e.status, {"detail": e.detail})
+        return
+    await _send(send, 200, payload, headers)
+
+# -----------------------------
+# In-process test client
+# -----------------------------
+class Response(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+class TestClient:
+    """Calls the ASGI app directly, without a server or sockets."""
+
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, asgi_app=app):
+        self.app = asgi_app
+
+    def request(self, method: str, path: str, json_body: Any = None, headers: Optional[Dict[str, str]] = None) -> Response:
+        return asyncio.run(self._request(method, path, json_body, headers or {}))
+
+    def get(self, path: str, headers: Optional[Dict[str, str]] = None) -> Response:
+        return self.request("GET", path, headers=headers)
+
+    def post(self, path: str, json_body: Any = None, headers: Optional[Dict[str, str]] = None) -> Response:
+        return self.request("POST", path, json_body, headers)
+
+    async def _request(self, method: str, path: str, json_body: Any, headers: Dict[str, str]) -> Response:
+        body = b"" if json_body is None else json.dumps(json_body).encode("utf-8")
+        scope = {
+            "type": "http",
+            "method": method,
+            "path": path,
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()],
+        }
+        sent = False
+        out: Dict[str, Any] = {"body": b""}
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(msg):
+            if msg["type"] == "http.response.start":
+                out["status"] = msg["status"]
+                out["headers"] = {k.decode("latin-1"): v.decode("latin-1") for k, v in msg["headers"]}
+            elif msg["type"] == "http.response.body":
+                out["body"] += msg.get("body", b"")
+
+        await self.app(scope, receive, send)
+        return Response(out["status"], out["headers"], out["body"])
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the SDC evaluation API (requires uvicorn).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is not installed: pip install uvicorn (or mount sdc.api:app in any ASGI server)")
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+import numpy as np
+from .compiler import CompiledRules, ZONES, per_rules
+
+class _Arrays:
+    """Weight matrices and flag compatibility matrices for one compiled rule set."""
+
+    def __init__(self, c: CompiledRules):
+        width = max(c.sizes)
+        # (levers, max values) weight matrices, padded with zeros
+        self.fiscal_w = np.zeros((len(c.levers), width), dtype=np.result_type(*sum(c.fiscal_w, ())))
+        self.social_w = np.zeros((len(c.levers), width), dtype=np.result_type(*sum(c.social_w, ())))
+        for i, (fw, sw) in enumerate(zip(c.fiscal_w, c.social_w)):
+            self.fiscal_w[i, : len(fw)] = fw
+            self.social_w[i, : len(sw)] = sw
+
+        # compat[i][v, f]: flag f does not rule out value v of lever i
+        self.compat = [np.ones((n, len(c.flags)), dtype=bool) for n in c.sizes]
+        for f, when in enumerate(c._flag_when):
+            for i, j in when:
+                col = np.zeros(c.sizes[i], dtype=bool)
+                col[j] = True
+                self.compat[i][:, f] &= col
+
+        # outcome columns: every (outcome, label) pair, in rule order
+        self.columns: List[Tuple[str, str]] = []
+        self.outcomes = []
+        for name, clauses, fallback in c._outcomes:
+            labels: Dict[str, int] = {}
+            def code(label: Any) -> int:
+                label = label or "N/A"
+                if label not in labels:
+                    labels[label] = len(self.columns)
+                    self.columns.append((name, label))
+                return labels[label]
+            compiled_clauses = [
+                (c.flag_pos[flag] if flag is not None else None, cond, code(lbl))
+                for flag, cond, lbl in clauses
+            ]
+            self.outcomes.append((compiled_clauses, code(fallback)))
+
+@per_rules(maxsize=1)
+def _arrays(c: CompiledRules) -> _Arrays:
+    return _Arrays(c)
+
+class BatchResult:
+    """Column-oriented results for n scenarios."""
+
+    def __init__(self, compiled, fiscal, social, zone, flags, outcomes, outcome_columns):
+        self.compiled = compiled
+        self.fiscal_stress: np.ndarray = fiscal      # (n,)
+        self.social_stress: np.ndarray = social      # (n,)
+        self.zone: np.ndarray = zone                 # (n,) codes into ZONES
+        self.flags: np.ndarray = flags               # (n, flags) bool, columns follow compiled.flags
+        self.outcomes: np.ndarray = outcomes         # (n, columns) bool, one True per outcome
+        self.outcome_columns: Tuple[Tuple[str, str], ...] = outcome_columns
+
+    def __len__(self) -> int:
+        return len(self.zone)
+
+    def result(self, k: int) -> Dict[str, Any]:
+        # same shape as engine.evaluate() for row k
+        return {
+            "fiscal_stress": self.fiscal_stress[k].item(),
+            "social_stress": self.social_stress[k].item(),
+            "zone": ZONES[self.zone[k]],
+            "flags": [self.compiled.flags[f] for f in np.flatnonzero(self.flags[k])],
+            "outcomes": {self.outcome_columns[j][0]: self.outcome_columns[j][1] for j in np.flatnonzero(self.outcomes[k])},
+        }
+
+def levers_array(compiled: CompiledRules, scenarios: Iterable[Any]) -> np.ndarray:
+    rows = [compiled.indexes(s) for s in scenarios]
+    return np.array(rows, dtype=np.intp).reshape(len(rows), len(compiled.levers))
+
+def evaluate_batch(levers: np.ndarray, compiled: CompiledRules) -> BatchResult:
+    levers = np.asarray(levers, dtype=np.intp)
+    if levers.ndim != 2 or levers.shape[1] != len(compiled.levers):
+        raise ValueError(f"expected an (n, {len(compiled.levers)}) array of lever indexes")
+    if levers.size and ((levers < 0).any() or (levers >= np.array(compiled.sizes)).any()):
+        raise ValueError("lever index out of range")
+    a = _arrays(compiled)
+    n = levers.shape[0]
+    rows = np.arange(len(compiled.levers))
+
+    # scores: gather one weight per lever and sum, then clamp 0..100
+    fiscal = np.clip(compiled.base_fiscal + a.fiscal_w[rows, levers].sum(axis=1), 0, 100)
+    social = np.clip(compiled.base_social + a.social_w[rows, levers].sum(axis=1), 0, 100)
+
+    (gf, gs), (af, as_) = compiled.zone_limits
+    zone = np.full(n, 2, dtype=np.int8)
+    zone[(fiscal <= af) & (social <= as_)] = 1
+    zone[(fiscal <= gf) & (social <= gs)] = 0
+
+    flags = np.ones((n, len(compiled.flags)), dtype=bool)
+    for i, compat in enumerate(a.compat):
+        flags &= compat[levers[:, i]]
+
+    outcomes = np.zeros((n, len(a.columns)), dtype=bool)
+    for clauses, fallback in a.outcomes:
+        # first match wins: apply clauses last to first
+        chosen = np.full(n, fallback, dtype=np.intp)
+        for flag, cond, code in reversed(clauses):
+            hit = np.zeros(n, dtype=bool)
+            if flag is not None:
+                hit |= flags[:, flag]
+            if cond is not None:
+                m = np.ones(n, dtype=bool)
+                for i, j in cond:
+                    m &= levers[:, i] == j
+                hit |= m
+            chosen[hit] = code
+        outcomes[np.arange(n), chosen] = True
+
+    return BatchResult(compiled, fiscal, social, zone, flags, outcomes, tuple(a.columns))
+
+@per_rules(maxsize=256)
+def cached_batch(compiled: CompiledRules, rows: Tuple[Tuple[int, ...], ...]) -> BatchResult:
+    """evaluate_batch() for a fixed tuple of lever-index rows, shared across reruns and sessions."""
+    return evaluate_batch(np.array(rows, dtype=np.intp).reshape(len(rows), len(compiled.levers)), compiled)
+
+# -----------------------------
+# Whole lever space
+# -----------------------------
+# Evaluating the whole space is only sensible up to this many combinations
+MAX_SPACE = 1_000_000
+
+def space_levers(compiled: CompiledRules) -> np.ndarray:
+    """Every lever combination, row-major (last lever varies fastest)."""
+    size = int(np.prod(compiled.sizes))
+    if size > MAX_SPACE:
+        raise ValueError(f"lever space too large to evaluate whole ({size} combinations)")
+    return np.indices(compiled.sizes, dtype=np.intp).reshape(len(compiled.sizes), -1).T
+
+@per_rules(maxsize=1)
+def space_batch(compiled: CompiledRules) -> BatchResult:
+    return evaluate_batch(space_levers(compiled), compiled)
+
+class Density(NamedTuple):
+    """The lever space grouped by map position: one entry per distinct (fiscal, social)."""
+    fiscal_stress: np.ndarray
+    social_stress: np.ndarray
+    zone: np.ndarray  # codes into ZONES (the zone only depends on the position)
+    count: np.ndarray  # scenarios at this position
+    flags_min: np.ndarray  # fewest / most flags triggered among them
+    flags_max: np.ndarray
+    red_max: np.ndarray  # most RED flags triggered among them
+
+@per_rules(maxsize=1)
+def space_density(compiled: CompiledRules) -> Density:
+    b = space_batch(compiled)
+    points, inverse, count = np.unique(
+        np.stack([b.fiscal_stress, b.social_stress], axis=1), axis=0, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.reshape(-1)
+    red = np.array([f["level"] == "RED" for f in compiled.flags], dtype=bool)
+    n_flags = b.flags.sum(axis=1)
+    n_red = b.flags[:, red].sum(axis=1)
+    k = len(points)
+    flags_min = np.full(k, np.iinfo(np.intp).max, dtype=np.intp)
+    flags_max = np.zeros(k, dtype=np.intp)
+    red_max = np.zeros(k, dtype=np.intp)
+    np.minimum.at(flags_min, inverse, n_flags)
+    np.maximum.at(flags_max, inverse, n_flags)
+    np.maximum.at(red_max, inverse, n_red)
+    zone = np.zeros(k, dtype=np.int8)
+    zone[inverse] = b.zone
+    return Density(points[:, 0], points[:, 1], zone, count, flags_min, flags_max, red_max)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import platform
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from . import engine, i18n
+from .compiler import compile_rules, levers_from_rules
+from .load import load_json
+from .schema import Scenario
+from . import synth
+from .synth import synth_rules, synth_scenarios
+
+# Micro-benchmarks of the engine and i18n hot paths.
+#   python -m sdc.bench --out bench.json              # real rules + synthetic size grid
+#   python -m sdc.bench --out new.json --compare bench.json
+# Timings are per call (best of --repeat runs); compare runs from the same machine only.
+
+LEVERS_GRID = (6, 12, 24)
+VALUES_GRID = (3, 6)
+FLAGS_GRID = (8, 64, 256)
+SCENARIOS = 200
+
+def _per_call(fn: Callable[[Any], Any], items: Sequence[Any], repeat: int) -> float:
+    def run() -> None:
+        for x in items:
+            fn(x)
+
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / (number * len(items))
+
+def _engine_benches(rules: Dict[str, Any], scenarios: Sequence[Any], compiled, ref: Any = engine) -> Iterable[Tuple[str, Callable, Sequence[Any]]]:
+    # ref: module with compute_scores/evaluate (sdc.synth for synthetic levers)
+    with_flags = [(s, engine.triggered_flags(s, rules)) for s in scenarios]
+    yield "compute_scores", lambda s: ref.compute_scores(s, rules), scenarios
+    yield "triggered_flags", lambda s: engine.triggered_flags(s, rules), scenarios
+    yield "compute_outcomes", lambda sf: engine.compute_outcomes(sf[0], sf[1], rules), with_flags
+    yield "evaluate", lambda s: ref.evaluate(s, rules), scenarios
+    yield "compiled.evaluate", compiled.evaluate, scenarios
+    # one lever moved to the value it has in the next scenario
+    states = [compiled.state(compiled.indexes(s)) for s in scenarios]
+    moves = [(st, k % len(compiled.levers), nxt) for k, (st, nxt) in enumerate(zip(states, states[1:] + states[:1]))]
+    yield "compiled.evaluate_delta", lambda m: compiled.move(m[0], m[1], m[2].idx[m[1]]), moves
+
+def _i18n_benches() -> Iterable[Tuple[str, Callable, Sequence[Any]]]:
+    keys = [(lang, k) for lang in i18n.FILES for k in list(i18n._OWN[lang])[:100]]
+    opts = [(lang, "options.timing", v) for lang in i18n.FILES for v in ("IMMEDIATE", "GRADUAL", "DELAYED")]
+    yield "i18n.t", lambda lk: i18n.t(lk[0], lk[1]), keys
+    yield "i18n.t(default)", lambda lk: i18n.t(lk[0], lk[1], default="x"), keys
+    yield "i18n.t(missing)", lambda lk: i18n.t(lk[0], "no.such." + lk[1]), keys
+    yield "i18n.opt", lambda a: i18n.opt(*a), opts
+
+def run(
+    levers_grid: Sequence[int] = LEVERS_GRID,
+    values_grid: Sequence[int] = VALUES_GRID,
+    flags_grid: Sequence[int] = FLAGS_GRID,
+    repeat: int = 5,
+    seed: int = 0,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+
+    def record(case: Dict[str, Any], name: str, fn: Callable, items: Sequence[Any]) -> None:
+        sec = _per_call(fn, items, repeat)
+        results.append({**case, "bench": name, "ns_per_call": round(sec * 1e9, 1)})
+        if log:
+            log(f"{case['case']:<24} {name:<24} {sec * 1e6:10.2f} µs")
+
+    # real rules and the whole scenario space
+    rules = load_json("data/rules.json")
+    compiled = compile_rules(rules)
+    scenarios = [Scenario(**dict(zip(compiled.levers, combo))) for combo in itertools.product(*compiled.values)]
+    case = {"case": "data/rules.json", "levers": len(compiled.levers), "values": max(compiled.sizes), "flags": len(compiled.flags)}
+    for name, fn, items in _engine_benches(rules, scenarios, compiled):
+        record(case, name, fn, items)
+    for name, fn, items in _i18n_benches():
+        record({"case": "i18n"}, name, fn, items)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rel in ("data/rules.json", *i18n.FILES.values()):
+            record({"case": "load_json"}, rel, load_json, [rel])
+
+        for n_levers in levers_grid:
+            for n_values in values_grid:
+                for n_flags in flags_grid:
+                    rules = synth_rules(n_levers, n_values, n_flags, seed)
+                    compiled = compile_rules(rules, levers_from_rules(rules))
+                    scenarios = synth_scenarios(rules, SCENARIOS, seed)
+                    case = {"case": f"synth L{n_levers}xV{n_values}xK{n_flags}", "levers": n_levers, "values": n_values, "flags": n_flags}
+                    for name, fn, items in _engine_benches(rules, scenarios, compiled, synth):
+                        record(case, name, fn, items)
+                    path = Path(tmp) / f"rules_{n_levers}_{n_values}_{n_flags}.json"
+                    path.write_text(json.dumps(rules), encoding="utf-8")
+                    record(case, "load_json", load_json, [str(path)])  # absolute paths bypass ROOT
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+def compare(new: Dict[str, Any], old: Dict[str, Any]) -> List[str]:
+    """One line per benchmark present in both runs: old -> new and the ratio."""
+    def key(r: Dict[str, Any]) -> Tuple[str, str]:
+        return r["case"], r["bench"]
+
+    before = {key(r): r["ns_per_call"] for r in old["results"]}
+    lines = []
+    for r in new["results"]:
+        was = before.get(key(r))
+        if was:
+            ratio = r["ns_per_call"] / was
+            mark = "  slower" if ratio > 1.10 else ("  faster" if ratio < 0.90 else "")
+            lines.append(f"{r['case']:<24} {r['bench']:<24} {was:>12.0f} -> {r['ns_per_call']:>12.0f} ns  x{ratio:.2f}{mark}")
+    return lines
+
+def _ints(text: str) -> Tuple[int, ...]:
+    return tuple(int(x) for x in text.split(","))
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sdc.bench", description="Benchmark the engine and i18n hot paths.")
+    parser.add_argument("--out", default="-", help="results JSON ('-' for stdout)")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--levers", type=_ints, default=LEVERS_GRID, help="comma-separated lever counts")
+    parser.add_argument("--values", type=_ints, default=VALUES_GRID, help="comma-separated values per lever")
+    parser.add_argument("--flags", type=_ints, default=FLAGS_GRID, help="comma-separated flag/outcome counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = run(args.levers, args.values, args.flags, args.repeat, args.seed, log=lambda m: print(m, file=sys.stderr))
+    text = json.dumps(report, indent=2)
+    if args.out == "-":
+        print(text)
+    else:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        for line in compare(report, old):
+            print(line, file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
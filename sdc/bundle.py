@@ -0,0 +1,179 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from .load import ROOT
+
+# Precompiled data bundle: every data file validated at build time and written, already
+# parsed, flattened and compiled, into one checksummed pickle. The app reads it in one go
+# and uses each part only while its source file is unchanged; anything else comes from
+# the JSON sources as before.
+#
+#   python -m sdc.bundle            build data/bundle.pkl
+#   python -m sdc.bundle --check    validate the data files only
+
+BUNDLE = "data/bundle.pkl"
+MAGIC = b"SDCBUNDLE1\n"
+# modules whose objects are pickled or built (i18n flattens the catalogs, bundle defines
+# Entry): editing one makes the bundle stale
+CODE = ("load", "schema", "compiler", "table", "trace_file", "trace_index", "i18n", "bundle")
+
+class Entry(NamedTuple):
+    sha256: str
+    sig: Tuple[int, int]  # (mtime_ns, size) at build time
+    value: Any
+
+def _code_hash() -> str:
+    h = hashlib.sha256(f"{sys.version_info[0]}.{sys.version_info[1]}".encode())
+    for name in CODE:
+        h.update((Path(__file__).parent / f"{name}.py").read_bytes())
+    return h.hexdigest()
+
+def _sig(p: Path) -> Tuple[int, int]:
+    st = p.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+# -----------------------------
+# Runtime
+# -----------------------------
+_BUNDLE: Optional[Dict[str, Any]] = None
+_LOCK = threading.Lock()
+
+def _read(path: Path) -> Dict[str, Any]:
+    try:
+        raw = path.read_bytes()
+    except OSError:
+        return {}
+    head = len(MAGIC) + 32
+    if raw[:len(MAGIC)] != MAGIC or hashlib.sha256(raw[head:]).digest() != raw[len(MAGIC):head]:
+        return {}
+    try:
+        payload = pickle.loads(raw[head:])
+    except Exception:  # built by another code version
+        return {}
+    if payload.get("code") != _code_hash():
+        return {}
+    return payload
+
+def _bundle() -> Dict[str, Any]:
+    global _BUNDLE
+    if _BUNDLE is None:
+        with _LOCK:
+            if _BUNDLE is None:
+                _BUNDLE = {} if os.environ.get("SDC_NO_BUNDLE") else _read(ROOT / BUNDLE)
+    return _BUNDLE
+
+def lookup(rel_path: str) -> Optional[Entry]:
+    """The prebuilt entry for a data file, or None if missing or the file changed since the build."""
+    entry = _bundle().get("files", {}).get(rel_path)
+    if entry is None:
+        return None
+    p = ROOT / rel_path
+    try:
+        sig = _sig(p)
+        if sig != entry.sig and hashlib.sha256(p.read_bytes()).hexdigest() != entry.sha256:
+            return None
+    except OSError:
+        return None
+    return entry._replace(sig=sig)  # e.g. a fresh checkout: same bytes, new mtime
+
+def prebuilt(kind: str, version: str) -> Any:
+    """A prebuilt object ("compiled", "table" or "index") for a data version, or None."""
+    return _bundle().get(kind, {}).get(version)
+
+# -----------------------------
+# Build
+# -----------------------------
+def build() -> Tuple[Dict[str, Any], List[str]]:
+    """Load and validate every data file; returns (payload, errors)."""
+    global _BUNDLE
+    _BUNDLE = {}  # from the JSON sources only
+    from .compiler import RulesError, get_compiled
+    from .schema import ScenarioKey
+    from .store import FILES, DataStore
+    from .table import get_table
+    from .trace_index import get_index
+
+    errors: List[str] = []
+    files: Dict[str, Entry] = {}
+    payload: Dict[str, Any] = {"code": _code_hash(), "files": files, "compiled": {}, "table": {}, "index": {}}
+
+    try:
+        data = DataStore(interval=float("inf")).get()
+    except (OSError, ValueError) as e:
+        return payload, [f"data files: {e}"]
+    for name, rel in FILES.items():
+        # the frozen values are shared with the compiled objects below, and stay so when unpickled
+        p = ROOT / rel
+        files[rel] = Entry(hashlib.sha256(p.read_bytes()).hexdigest(), _sig(p), getattr(data, name))
+
+    try:
+        compiled = get_compiled(data.rules, data.rules_version)
+        table = get_table(data.rules, data.rules_version)
+    except (RulesError, ValueError) as e:
+        errors.append(f"{FILES['rules']}: {e}")
+    else:
+        payload["compiled"][data.rules_version] = compiled
+        payload["table"][data.rules_version] = table
+        for name, values in data.presets.items():
+            try:
+                compiled.indexes(ScenarioKey.from_values(values))
+            except ValueError as e:
+                errors.append(f"{FILES['presets']}: preset '{name}': {e}")
+
+    ids = [a.get("id") for a in data.trace]
+    missing = [n for n, i in enumerate(ids) if not i]
+    dupes = sorted({i for i in ids if i and ids.count(i) > 1})
+    if missing:
+        errors.append(f"{FILES['trace']}: anchor(s) without an id at position {missing}")
+    if dupes:
+        errors.append(f"{FILES['trace']}: duplicate anchor id(s) {dupes}")
+    flag_ids = [f["id"] for f in data.rules.get("flags", ())]
+    payload["index"][data.version] = get_index(data.trace, data.version, flag_ids)
+
+    try:
+        from . import i18n  # loads both catalogs
+    except ValueError as e:
+        return payload, errors + [f"i18n: {e}"]
+    for lang, rel in i18n.FILES.items():
+        p = ROOT / rel
+        nested = i18n.get_dict(lang)
+        if not isinstance(nested, dict):
+            errors.append(f"{rel}: expected an object")
+            continue
+        files[rel] = Entry(hashlib.sha256(p.read_bytes()).hexdigest(), _sig(p), (nested, i18n._OWN[lang]))
+    return payload, errors
+
+def write(payload: Dict[str, Any], path: Path) -> int:
+    blob = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(MAGIC + hashlib.sha256(blob).digest() + blob)
+    os.replace(tmp, path)  # readers never see a partial bundle
+    return len(MAGIC) + 32 + len(blob)
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sdc.bundle", description="Validate the data files and build the data bundle.")
+    parser.add_argument("--out", default=BUNDLE, help="bundle path, relative to the project root")
+    parser.add_argument("--check", action="store_true", help="validate only, do not write the bundle")
+    args = parser.parse_args(argv)
+
+    payload, errors = build()
+    for e in errors:
+        print(e, file=sys.stderr)
+    if errors:
+        return 1
+    if args.check:
+        print(f"{len(payload['files'])} data file(s) valid")
+        return 0
+    size = write(payload, ROOT / args.out)
+    print(f"{args.out}: {len(payload['files'])} data file(s), {size:,} bytes")
+    return 0
+
+if __name__ == "__main__":
+    from . import bundle  # pickle Entry as sdc.bundle.Entry, not __main__.Entry
+    raise SystemExit(bundle.main())
@@ -0,0 +1,246 @@
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import sys
+import time
+from contextlib import ExitStack
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from pydantic import ValidationError
+from .compiler import get_compiled, rules_version
+from .engine import EVAL_CACHE, cached_evaluate
+from .load import ROOT
+from .schema import Scenario
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Rules of the current process (set in the parent, or per worker by _init_worker)
+_RULES: Dict[str, Any] = {}
+_VERSION = ""
+
+def _init_worker(rules: Dict[str, Any], cache_size: int) -> None:
+    global _RULES, _VERSION
+    _RULES, _VERSION = rules, rules_version(rules)
+    get_compiled(rules, _VERSION)
+    EVAL_CACHE.resize(cache_size)
+
+def _json_default(o: Any) -> Any:
+    # cached results are read-only mappings; pydantic error contexts may hold exceptions
+    return dict(o) if isinstance(o, Mapping) else str(o)
+
+def _eval_line(item: Tuple[int, str]) -> Tuple[str, bool]:
+    n, line = item
+    try:
+        s = Scenario.model_validate_json(line)
+        out = {"line": n, "name": s.name, **cached_evaluate(s, _RULES, _VERSION)}
+        ok = True
+    except (ValidationError, ValueError) as e:
+        msg = e.errors(include_url=False) if isinstance(e, ValidationError) else str(e)
+        out = {"line": n, "error": msg}
+        ok = False
+    return json.dumps(out, ensure_ascii=False, default=_json_default), ok
+
+def _read_json(path: str) -> Any:
+    return json.loads(Path(path).read_text(encoding="utf-8-sig"))
+
+def _lines(f) -> Iterator[Tuple[int, str]]:
+    for n, line in enumerate(f, start=1):
+        if line.strip():
+            yield n, line
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return peak * scale / (1024 * 1024)
+
+def _eval_chunk(items: List[Tuple[int, str]]) -> List[Tuple[str, bool]]:
+    return [_eval_line(item) for item in items]
+
+def _chunks(items: Iterable[Tuple[int, str]], size: int) -> Iterator[List[Tuple[int, str]]]:
+    it = iter(items)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _results(items: Iterable[Tuple[int, str]], args: argparse.Namespace) -> Iterator[Tuple[str, bool]]:
+    workers, chunk = args.workers, args.chunk_size
+    if workers == 1:
+        for item in items:
+            yield _eval_line(item)
+        return
+    with Pool(workers, initializer=_init_worker, initargs=(_RULES, args.cache_size)) as pool:
+        # one task = one chunk of lines; tasks are submitted a bounded window at a
+        # time so memory stays flat, and imap keeps the output in input order
+        for window in _chunks(_chunks(items, chunk), workers * 4):
+            for results in pool.imap(_eval_chunk, window):
+                yield from results
+
+def cmd_evaluate(args: argparse.Namespace) -> int:
+    try:
+        _init_worker(_read_json(args.rules), args.cache_size)
+    except (OSError, ValueError) as e:  # unreadable, not JSON, or RulesError
+        print(f"{args.rules}: {e}", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    total = errors = 0
+    with ExitStack() as stack:
+        fin = sys.stdin if args.inp == "-" else stack.enter_context(open(args.inp, encoding="utf-8-sig"))
+        fout = sys.stdout if args.out == "-" else stack.enter_context(open(args.out, "w", encoding="utf-8"))
+        for text, ok in _results(_lines(fin), args):
+            fout.write(text + "\n")
+            total += 1
+            errors += not ok
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    rss = _peak_rss_mb()
+    print(
+        f"evaluated {total} scenario(s) ({errors} invalid) in {elapsed:.2f}s"
+        f" — {rate:,.0f} scenarios/s"
+        + (f", peak RSS {rss:.1f} MiB" if rss is not None else ""),
+        file=sys.stderr,
+    )
+    if args.workers == 1:
+        c = EVAL_CACHE.stats()
+        print(
+            f"result cache: {c['hits']} hit(s), {c['misses']} miss(es), {c['evictions']} eviction(s)"
+            f" ({c['hit_rate']:.1%} hit rate, {c['saved_seconds']:.2f}s of compute saved)",
+            file=sys.stderr,
+        )
+    return 1 if errors else 0
+
+def _pct(n: int, total: int) -> str:
+    return f"{n:,} ({n / total:.1%})" if total else f"{n:,}"
+
+def cmd_analyze(args: argparse.Namespace) -> int:
+    from .analyze import analyze, verify
+    from .compiler import compile_rules, levers_from_rules
+    from .schema import LEVERS
+
+    try:
+        rules = _read_json(args.rules)
+        # rules on the Scenario levers keep the Scenario lever order; others (e.g. synthetic) their own
+        levers = levers_from_rules(rules)
+        c = compile_rules(rules, None if set(levers) == set(LEVERS) else levers)
+    except (OSError, ValueError) as e:  # unreadable, not JSON, or RulesError
+        print(f"{args.rules}: {e}", file=sys.stderr)
+        return 2
+    presets = None
+    path = args.presets or (str(ROOT / "data/presets.json") if c.levers == tuple(LEVERS) else None)
+    if path:
+        try:
+            presets = _read_json(path)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            return 2
+
+    start = time.perf_counter()
+    a = analyze(c, presets)
+    elapsed = time.perf_counter() - start
+    try:
+        mismatches = verify(c, a) if args.verify else []
+    except ValueError as e:
+        print(f"--verify: {e}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        out = a._asdict()
+        out["outcomes"] = [{**o._asdict(), "clauses": [cl._asdict() for cl in o.clauses]} for o in a.outcomes]
+        out.update(never_fire=a.never_fire, always_fire=a.always_fire, seconds=elapsed)
+        if args.verify:
+            out["verify"] = mismatches
+        print(json.dumps(out, ensure_ascii=False, indent=2, default=_json_default))
+        return 1 if mismatches else 0
+
+    total = a.space
+    print(f"{args.rules}: {total:,} scenario(s) over {len(c.levers)} lever(s), analyzed in {elapsed:.3f}s")
+    print("\nZones")
+    for z, n in a.zones.items():
+        print(f"  {z:<6} {_pct(n, total)}")
+    (fmin, fmax), (smin, smax) = a.raw_range
+    print(f"\nClamped to 0..100 (raw fiscal {fmin}..{fmax}, raw social {smin}..{smax})")
+    for k, n in a.clamped.items():
+        print(f"  {k:<12} {_pct(n, total)}")
+    print("\nFlags")
+    for fid, n in a.flags.items():
+        note = " — never fires" if n == 0 else " — always fires" if n == total else ""
+        print(f"  {fid:<30} {_pct(n, total)}{note}")
+    print("\nOutcome rules (scenarios where each clause is the first match)")
+    for o in a.outcomes:
+        if o.skipped:
+            print(f"  {o.name}: reads too many lever combinations to break down")
+            continue
+        print(f"  {o.name}")
+        for cl in o.clauses:
+            note = " — never the first match" if cl.first == 0 else ""
+            print(f"    logic[{cl.logic}] {cl.label!r:<45} {_pct(cl.first, total)}{note}")
+        print(f"    default{'':<46} {_pct(o.default, total)}")
+    if presets is not None:
+        print("\nPresets")
+        for names in a.equivalent:
+            print("  same results: " + ", ".join(names))
+        if not a.equivalent:
+            print("  no two presets have the same results")
+        for name, err in a.invalid_presets.items():
+            print(f"  {name}: {err}")
+    if a.diagnostics:
+        print("\nCompiler diagnostics")
+        for d in a.diagnostics:
+            print(f"  {d}")
+    if args.verify:
+        print("\nBrute-force check: " + ("ok" if not mismatches else f"{len(mismatches)} mismatch(es)"))
+        for m in mismatches:
+            print(f"  {m}")
+    return 1 if mismatches else 0
+
+def _at_least(low: int):
+    # argparse type: an int >= low, rejected at parse time (a zero chunk size drops every line)
+    def parse(text: str) -> int:
+        try:
+            n = int(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid int value: '{text}'")
+        if n < low:
+            raise argparse.ArgumentTypeError(f"must be at least {low}, got {n}")
+        return n
+    return parse
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sdc.cli", description="Strategic Debt Compass command line tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ev = sub.add_parser("evaluate", help="evaluate a JSONL file of scenarios (one Scenario object per line)")
+    ev.add_argument("--rules", default=str(ROOT / "data/rules.json"))
+    ev.add_argument("--in", dest="inp", required=True, help="input .jsonl ('-' for stdin)")
+    ev.add_argument("--out", required=True, help="output .jsonl ('-' for stdout)")
+    ev.add_argument("--workers", type=_at_least(1), default=1, help="worker processes (output order is preserved)")
+    ev.add_argument("--chunk-size", type=_at_least(1), default=256, help="lines per task sent to a worker")
+    ev.add_argument("--cache-size", type=_at_least(0), default=4096, help="memoized results kept per process")
+    ev.set_defaults(func=cmd_evaluate)
+
+    an = sub.add_parser("analyze", help="zone, flag, outcome-clause and clamp coverage over every lever combination")
+    an.add_argument("--rules", default=str(ROOT / "data/rules.json"))
+    an.add_argument("--presets", help="presets file checked for equivalent results (default: data/presets.json for the app's levers)")
+    an.add_argument("--verify", action="store_true", help="cross-check against evaluating every combination (small spaces only)")
+    an.add_argument("--json", action="store_true", help="print the report as JSON")
+    an.set_defaults(func=cmd_analyze)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
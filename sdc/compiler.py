@@ -0,0 +1,497 @@
+from __future__ import annotations
+import hashlib
+import itertools
+import math
+import json
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+from . import bundle
+from .schema import LEVERS
+
+LEVEL_ORDER = {"RED": 0, "AMBER": 1, "GREEN": 2}
+ZONES = ("GREEN", "AMBER", "RED")
+
+# Outcomes whose decision table would exceed this many keys fall back to a first-match scan
+OUTCOME_TABLE_LIMIT = 1 << 16
+
+class RulesError(ValueError):
+    """Raised when a rules file cannot be compiled."""
+
+def rules_version(rules: Mapping[str, Any]) -> str:
+    blob = json.dumps(rules, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=dict)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+def _get(d: Any, key: str, where: str) -> Any:
+    if not isinstance(d, Mapping) or key not in d:
+        raise RulesError(f"{where}: missing '{key}'")
+    return d[key]
+
+def _number(v: Any, where: str) -> Any:
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        raise RulesError(f"{where}: expected a number, got {v!r}")
+    return v
+
+class EvalState(NamedTuple):
+    """One evaluated lever combination, in the form evaluate_delta() updates."""
+    idx: Tuple[int, ...]
+    fiscal_raw: Any  # unclamped sums; clamping happens in result()
+    social_raw: Any
+    mask: int
+    labels: Tuple[str, ...]  # follows outcome_names
+
+class CompiledRules:
+    """Rules resolved to lever/value indexes, ready for repeated evaluation."""
+
+    def __init__(self, rules: Mapping[str, Any], levers: Mapping[str, Sequence[str]], version: str):
+        self.rules = rules
+        self.version = version
+        self.levers: Tuple[str, ...] = tuple(levers)
+        self.values: Tuple[Tuple[str, ...], ...] = tuple(tuple(levers[k]) for k in self.levers)
+        self.index: Tuple[Dict[str, int], ...] = tuple(
+            {v: j for j, v in enumerate(vals)} for vals in self.values
+        )
+        self.lever_pos: Dict[str, int] = {k: i for i, k in enumerate(self.levers)}
+        self.sizes: Tuple[int, ...] = tuple(len(v) for v in self.values)
+
+        self._compile_scoring(_get(rules, "scoring", "rules"))
+        self._compile_zones(_get(rules, "zones", "rules"))
+        self._compile_flags(rules.get("flags", []))
+        self._compile_outcomes(rules.get("outcome_rules", []))
+        self._init_memo()
+
+    def _init_memo(self) -> None:
+        self._memo: Dict[Hashable, "OrderedDict[Hashable, Any]"] = {}
+        self._memo_lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the data bundle pickles the compiled rules, not what was derived from them
+        state = dict(self.__dict__)
+        del state["_memo"], state["_memo_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_memo()
+
+    def memo(self, kind: Hashable, key: Hashable, build: Callable[[], Any], maxsize: int) -> Any:
+        """LRU of data derived from these rules (batches, searches), held on this object
+        so it goes when the version is evicted from get_compiled()."""
+        with self._memo_lock:
+            cache = self._memo.setdefault(kind, OrderedDict())
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+        value = build()
+        with self._memo_lock:
+            cache[key] = value
+            while len(cache) > maxsize:
+                cache.popitem(last=False)
+        return value
+
+    # -----------------------------
+    # Compilation
+    # -----------------------------
+    def _lever_value(self, lever: str, value: Any, where: str) -> Tuple[int, int]:
+        if lever not in self.lever_pos:
+            raise RulesError(f"{where}: unknown lever '{lever}'")
+        i = self.lever_pos[lever]
+        if value not in self.index[i]:
+            raise RulesError(f"{where}: unknown value '{value}' for lever '{lever}'")
+        return i, self.index[i][value]
+
+    def _conditions(self, when: Any, where: str) -> Tuple[Tuple[int, int], ...]:
+        if not isinstance(when, Mapping):
+            raise RulesError(f"{where}: expected a mapping of lever -> value")
+        return tuple(self._lever_value(k, v, where) for k, v in when.items())
+
+    def _compile_scoring(self, scoring: Any) -> None:
+        base = _get(scoring, "base", "scoring")
+        weights = _get(scoring, "weights", "scoring")
+        self.base_fiscal = int(_number(_get(base, "fiscal_stress", "scoring.base"), "scoring.base.fiscal_stress"))
+        self.base_social = int(_number(_get(base, "social_stress", "scoring.base"), "scoring.base.social_stress"))
+
+        fiscal_w: List[Tuple[Any, ...]] = []
+        social_w: List[Tuple[Any, ...]] = []
+        for lever, vals in zip(self.levers, self.values):
+            table = _get(weights, lever, "scoring.weights")
+            f_row, s_row = [], []
+            for v in vals:
+                where = f"scoring.weights.{lever}.{v}"
+                w = _get(table, v, f"scoring.weights.{lever}")
+                f_row.append(_number(_get(w, "fiscal_stress", where), where))
+                s_row.append(_number(_get(w, "social_stress", where), where))
+            fiscal_w.append(tuple(f_row))
+            social_w.append(tuple(s_row))
+        self.fiscal_w: Tuple[Tuple[Any, ...], ...] = tuple(fiscal_w)
+        self.social_w: Tuple[Tuple[Any, ...], ...] = tuple(social_w)
+
+    def _compile_zones(self, zones: Any) -> None:
+        self.zone_limits = tuple(
+            (
+                _number(_get(_get(zones, z, "zones"), "max_fiscal", f"zones.{z}"), f"zones.{z}.max_fiscal"),
+                _number(_get(_get(zones, z, "zones"), "max_social", f"zones.{z}"), f"zones.{z}.max_social"),
+            )
+            for z in ("green", "amber")
+        )
+
+    def _compile_flags(self, flags: Any) -> None:
+        if not isinstance(flags, Sequence):
+            raise RulesError("flags: expected a list")
+        seen = set()
+        for n, f in enumerate(flags):
+            fid = _get(f, "id", f"flags[{n}]")
+            _get(f, "level", f"flags[{n}]")
+            if fid in seen:
+                raise RulesError(f"flags[{n}]: duplicate id '{fid}'")
+            seen.add(fid)
+        # sort once: RED first, then AMBER (stable, like triggered_flags)
+        self.flags: Tuple[Mapping[str, Any], ...] = tuple(
+            sorted(flags, key=lambda x: LEVEL_ORDER.get(x["level"], 9))
+        )
+        self.flag_pos: Dict[str, int] = {f["id"]: i for i, f in enumerate(self.flags)}
+        self._flag_when = tuple(
+            self._conditions(_get(f, "when", f"flags.{f['id']}"), f"flags.{f['id']}.when")
+            for f in self.flags
+        )
+
+        # inverted index: flag_masks[i][j] has bit f set when flag f is compatible
+        # with value j of lever i (no condition on lever i, or the condition is j).
+        # Bits follow self.flags, so set bits come out already RED -> AMBER.
+        self.all_flags = (1 << len(self.flags)) - 1
+        masks = [[self.all_flags] * n for n in self.sizes]
+        for f, when in enumerate(self._flag_when):
+            for i, j in when:
+                for v in range(self.sizes[i]):
+                    if v != j:
+                        masks[i][v] &= ~(1 << f)
+        self.flag_masks: Tuple[Tuple[int, ...], ...] = tuple(tuple(m) for m in masks)
+
+    def _compile_outcomes(self, specs: Any) -> None:
+        if not isinstance(specs, Sequence):
+            raise RulesError("outcome_rules: expected a list")
+        self.diagnostics: List[str] = []
+        outcomes = []
+        positions = []
+        for n, spec in enumerate(specs):
+            name = _get(spec, "outcome", f"outcome_rules[{n}]")
+            where = f"outcome_rules.{name}"
+            logic = _get(spec, "logic", where)
+            clauses, at = [], []
+            fallback = None
+            defaults = []
+            for m, rule in enumerate(logic):
+                rw = f"{where}.logic[{m}]"
+                if not isinstance(rule, Mapping) or not ({"if_flag", "if", "default"} & rule.keys()):
+                    raise RulesError(f"{rw}: expected 'if_flag', 'if' or 'default'")
+                if "if_flag" in rule or "if" in rule:
+                    flag = None
+                    if "if_flag" in rule:
+                        if rule["if_flag"] not in self.flag_pos:
+                            raise RulesError(f"{rw}: unknown flag '{rule['if_flag']}'")
+                        flag = rule["if_flag"]
+                    cond = self._conditions(rule["if"], f"{rw}.if") if "if" in rule else None
+                    clauses.append((flag, cond, _get(rule, "label", rw)))
+                    at.append(m)
+                if "default" in rule:
+                    fallback = rule["default"]
+                    defaults.append(m)
+            # a default does not stop the scan: later defaults overwrite it and
+            # later matching clauses still win, so only a trailing default reads right
+            for m in defaults[:-1]:
+                self.diagnostics.append(f"{where}.logic[{m}]: default is overwritten by the default at logic[{defaults[-1]}]")
+            if defaults and defaults[-1] != len(logic) - 1:
+                self.diagnostics.append(f"{where}.logic[{defaults[-1]}]: default is not the last entry; clauses after it still take precedence")
+            outcomes.append((name, tuple(clauses), fallback))
+            positions.append(tuple(at))
+        self._outcomes = tuple(outcomes)
+        self._clause_at = tuple(positions)  # logic[] index of each clause
+        self.outcome_names: Tuple[str, ...] = tuple(o[0] for o in outcomes)
+        self._decision_tables = tuple(
+            self._decision_table(name, clauses, fallback, at)
+            for (name, clauses, fallback), at in zip(outcomes, positions)
+        )
+
+        # per lever: the flags whose 'when' reads it, and the outcomes that read it
+        # directly or through one of its if_flag bits (what evaluate_delta() re-checks)
+        lever_flags = [0] * len(self.levers)
+        for f, when in enumerate(self._flag_when):
+            for i, _ in when:
+                lever_flags[i] |= 1 << f
+        self.lever_flags: Tuple[int, ...] = tuple(lever_flags)
+        self.lever_outcomes: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(
+                o for o, (fmask, levers, *_) in enumerate(self._decision_tables)
+                if i in levers or fmask & lever_flags[i]
+            )
+            for i in range(len(self.levers))
+        )
+
+    def _decision_table(self, name: str, clauses: Sequence[Any], fallback: Any, at: Sequence[int]) -> Tuple[Any, ...]:
+        # key: (flag mask restricted to the outcome's if_flag bits, mixed-radix code
+        # of the levers its 'if' clauses read) -> label of the first matching clause
+        bits = sorted({self.flag_pos[flag] for flag, _, _ in clauses if flag is not None})
+        fmask = sum(1 << f for f in bits)
+        levers = sorted({i for _, cond, _ in clauses if cond for i, _ in cond})
+        strides, size = [], 1
+        for i in reversed(levers):
+            strides.append(size)
+            size *= self.sizes[i]
+        strides.reverse()
+        default = fallback or "N/A"
+        plan = [
+            (None if flag is None else 1 << self.flag_pos[flag], cond, lbl or "N/A")
+            for flag, cond, lbl in clauses
+        ]
+        if size << len(bits) > OUTCOME_TABLE_LIMIT:
+            # too many keys: keep the first-match scan for this outcome
+            return fmask, tuple(levers), tuple(strides), None, tuple(plan), default
+
+        def first(mask: int, vals: Dict[int, int]) -> Tuple[int, str]:
+            for n, (bit, cond, lbl) in enumerate(plan):
+                if (bit is not None and mask & bit) or (cond is not None and all(vals[i] == j for i, j in cond)):
+                    return n, lbl
+            return -1, default
+
+        table: Dict[Tuple[int, int], str] = {}
+        hits = [0] * len(plan)
+        # every lever the outcome reads, directly or through its flags: the flag mask
+        # follows from their values, so only combinations that can happen are counted
+        reads = sorted({*levers, *(i for f in bits for i, _ in self._flag_when[f])})
+        if math.prod(self.sizes[i] for i in reads) <= OUTCOME_TABLE_LIMIT:
+            pos = [reads.index(i) for i in levers]
+            for combo in itertools.product(*(range(self.sizes[i]) for i in reads)):
+                vals = dict(zip(reads, combo))
+                code = sum(combo[k] * s for k, s in zip(pos, strides))
+                mask = fmask
+                for i, v in vals.items():
+                    mask &= self.flag_masks[i][v]
+                n, table[(mask, code)] = first(mask, vals)
+                if n >= 0:
+                    hits[n] += 1
+        else:
+            # every subset of the flag bits compatible with the 'if' levers: a superset
+            # of what can happen, so a clause may be reported reachable when it is not
+            for combo in itertools.product(*(range(self.sizes[i]) for i in levers)):
+                vals = dict(zip(levers, combo))
+                code = sum(v * s for v, s in zip(combo, strides))
+                compat = self.all_flags
+                for i, v in vals.items():
+                    compat &= self.flag_masks[i][v]
+                for sub in range(1 << len(bits)):
+                    mask = sum(1 << f for b, f in enumerate(bits) if sub >> b & 1)
+                    if mask & ~compat:
+                        continue  # a flag that cannot fire with these lever values
+                    n, table[(mask, code)] = first(mask, vals)
+                    if n >= 0:
+                        hits[n] += 1
+        for n, h in enumerate(hits):
+            if not h:
+                self.diagnostics.append(
+                    f"outcome_rules.{name}.logic[{at[n]}]: never the first match (shadowed or unreachable)"
+                )
+        return fmask, tuple(levers), tuple(strides), table, tuple(plan), default
+
+    # -----------------------------
+    # Evaluation
+    # -----------------------------
+    def indexes(self, s: Any) -> Tuple[int, ...]:
+        out = []
+        for lever, ix in zip(self.levers, self.index):
+            v = getattr(s, lever)
+            if v not in ix:
+                raise ValueError(f"unknown value '{v}' for lever '{lever}'")
+            out.append(ix[v])
+        return tuple(out)
+
+    def scores(self, idx: Sequence[int]) -> Tuple[int, int]:
+        fiscal = self.base_fiscal
+        social = self.base_social
+        for j, fw, sw in zip(idx, self.fiscal_w, self.social_w):
+            fiscal += fw[j]
+            social += sw[j]
+        # clamp 0..100 for UI simplicity
+        return max(0, min(100, fiscal)), max(0, min(100, social))
+
+    def zone(self, fiscal: int, social: int) -> str:
+        (gf, gs), (af, as_) = self.zone_limits
+        if fiscal <= gf and social <= gs:
+            return "GREEN"
+        if fiscal <= af and social <= as_:
+            return "AMBER"
+        return "RED"
+
+    def flag_mask(self, idx: Sequence[int]) -> int:
+        mask = self.all_flags
+        for masks, j in zip(self.flag_masks, idx):
+            mask &= masks[j]
+        return mask
+
+    def flags_of(self, mask: int) -> List[Mapping[str, Any]]:
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(self.flags[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+    def triggered(self, idx: Sequence[int]) -> List[Mapping[str, Any]]:
+        return self.flags_of(self.flag_mask(idx))
+
+    def triggered_flags(self, s: Any) -> List[Mapping[str, Any]]:
+        return self.triggered(self.indexes(s))
+
+    def _outcome(self, o: int, idx: Sequence[int], mask: int) -> str:
+        fmask, levers, strides, table, plan, default = self._decision_tables[o]
+        if table is not None:
+            code = 0
+            for i, st in zip(levers, strides):
+                code += idx[i] * st
+            return table[(mask & fmask, code)]
+        for bit, cond, lbl in plan:
+            if (bit is not None and mask & bit) or (cond is not None and all(idx[i] == j for i, j in cond)):
+                return lbl
+        return default
+
+    def outcomes(self, idx: Sequence[int], mask: int) -> Dict[str, str]:
+        return {name: self._outcome(o, idx, mask) for o, name in enumerate(self.outcome_names)}
+
+    def evaluate_indexes(self, idx: Sequence[int]) -> Dict[str, Any]:
+        fiscal, social = self.scores(idx)
+        mask = self.flag_mask(idx)
+        return {
+            "fiscal_stress": fiscal,
+            "social_stress": social,
+            "zone": self.zone(fiscal, social),
+            "flags": self.flags_of(mask),
+            "outcomes": self.outcomes(idx, mask),
+        }
+
+    def evaluate(self, s: Any) -> Dict[str, Any]:
+        return self.evaluate_indexes(self.indexes(s))
+
+    # -----------------------------
+    # Incremental evaluation
+    # -----------------------------
+    def state(self, idx: Sequence[int]) -> EvalState:
+        idx = tuple(idx)
+        mask = self.flag_mask(idx)
+        return EvalState(
+            idx,
+            self.base_fiscal + sum(w[j] for w, j in zip(self.fiscal_w, idx)),
+            self.base_social + sum(w[j] for w, j in zip(self.social_w, idx)),
+            mask,
+            tuple(self._outcome(o, idx, mask) for o in range(len(self.outcome_names))),
+        )
+
+    def evaluate_delta(self, prev: EvalState, lever: str, value: str) -> EvalState:
+        """prev with one lever changed: swaps that lever's weights, re-checks only the
+        flags and outcomes that read it."""
+        i, j = self._lever_value(lever, value, "evaluate_delta")
+        return self.move(prev, i, j)
+
+    def move(self, prev: EvalState, i: int, j: int) -> EvalState:
+        old = prev.idx[i]
+        if j == old:
+            return prev
+        idx = prev.idx[:i] + (j,) + prev.idx[i + 1:]
+
+        lf = self.lever_flags[i]
+        mask = prev.mask & ~lf
+        todo = lf
+        while todo:
+            low = todo & -todo
+            if all(idx[k] == v for k, v in self._flag_when[low.bit_length() - 1]):
+                mask |= low
+            todo ^= low
+
+        changed = mask ^ prev.mask
+        labels = prev.labels
+        affected = [
+            o for o in self.lever_outcomes[i]
+            if i in self._decision_tables[o][1] or self._decision_tables[o][0] & changed
+        ]
+        if affected:
+            labels = list(labels)
+            for o in affected:
+                labels[o] = self._outcome(o, idx, mask)
+            labels = tuple(labels)
+
+        return EvalState(
+            idx,
+            prev.fiscal_raw - self.fiscal_w[i][old] + self.fiscal_w[i][j],
+            prev.social_raw - self.social_w[i][old] + self.social_w[i][j],
+            mask,
+            labels,
+        )
+
+    def clamped(self, state: EvalState) -> Tuple[int, int]:
+        return max(0, min(100, state.fiscal_raw)), max(0, min(100, state.social_raw))
+
+    def result(self, state: EvalState) -> Dict[str, Any]:
+        fiscal, social = self.clamped(state)
+        return {
+            "fiscal_stress": fiscal,
+            "social_stress": social,
+            "zone": self.zone(fiscal, social),
+            "flags": self.flags_of(state.mask),
+            "outcomes": dict(zip(self.outcome_names, state.labels)),
+        }
+
+def per_rules(maxsize: int) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """lru_cache for functions of (CompiledRules, *hashable args), kept in CompiledRules.memo()."""
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        kind = (fn.__module__, fn.__qualname__)
+
+        @wraps(fn)
+        def cached(c: CompiledRules, *args: Any) -> Any:
+            return c.memo(kind, args, lambda: fn(c, *args), maxsize)
+        return cached
+    return decorate
+
+def levers_from_rules(rules: Mapping[str, Any]) -> Dict[str, Tuple[str, ...]]:
+    """Lever -> values as declared by scoring.weights (for rules not tied to Scenario)."""
+    weights = _get(_get(rules, "scoring", "rules"), "weights", "scoring")
+    return {lever: tuple(table) for lever, table in weights.items()}
+
+def compile_rules(
+    rules: Mapping[str, Any],
+    levers: Optional[Mapping[str, Sequence[str]]] = None,
+    version: Optional[str] = None,
+) -> CompiledRules:
+    return CompiledRules(rules, LEVERS if levers is None else levers, version or rules_version(rules))
+
+# Process-wide cache: one compiled rule set per rules version (oldest dropped first)
+MAX_VERSIONS = 8
+_COMPILED: Dict[str, CompiledRules] = {}
+_LOCK = threading.Lock()
+
+def get_compiled(rules: Mapping[str, Any], version: Optional[str] = None) -> CompiledRules:
+    version = version or rules_version(rules)
+    compiled = _COMPILED.get(version)
+    if compiled is None:
+        compiled = bundle.prebuilt("compiled", version) or compile_rules(rules, version=version)
+        with _LOCK:
+            compiled = _COMPILED.setdefault(version, compiled)
+            while len(_COMPILED) > MAX_VERSIONS:
+                del _COMPILED[next(iter(_COMPILED))]
+    return compiled
+
+def forget(version: str) -> None:
+    with _LOCK:
+        _COMPILED.pop(version, None)
+
+if __name__ == "__main__":
+    import sys
+    from .load import load_json
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "data/rules.json"
+    try:
+        c = compile_rules(load_json(path))
+    except RulesError as e:
+        print(f"{path}: {e}")
+        raise SystemExit(1)
+    print(f"{path}: compiled (version {c.version}), {len(c.flags)} flag(s), {len(c.outcome_names)} outcome(s)")
+    for line in c.diagnostics:
+        print("  warning:", line)
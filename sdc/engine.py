@@ -1,6 +1,14 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Tuple
-from .schema import Scenario
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Mapping, Optional, Tuple
+from .schema import ScenarioKey
+from .compiler import CompiledRules, EvalState, RulesError, compile_rules, get_compiled, levers_from_rules, rules_version  # noqa: F401
+from .load import freeze
+
+if TYPE_CHECKING:
+    from .schema import Scenario
 
 def _match_when(s: Scenario, when: Dict[str, str]) -> bool:
     for k, v in when.items():
@@ -88,3 +96,82 @@ def evaluate(s: Scenario, rules: Dict[str, Any]) -> Dict[str, Any]:
         "flags": flags,
         "outcomes": outcomes,
     }
+
+# -----------------------------
+# Memoized evaluate (shared across sessions)
+# -----------------------------
+class EvalCache:
+    """Bounded LRU of frozen evaluate() results keyed by (rules version, lever indexes)."""
+
+    def __init__(self, maxsize: int = 4096):
+        if maxsize < 0:
+            raise ValueError(f"cache size must be >= 0, got {maxsize}")
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[str, Tuple[int, ...]], Tuple[Mapping[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+        self.saved = 0.0  # seconds of compute avoided by hits
+
+    def get(self, key: Tuple[str, Tuple[int, ...]], compute: Callable[[], Dict[str, Any]]) -> Mapping[str, Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                self.saved += entry[1]
+                return entry[0]
+            self.misses += 1
+        start = time.perf_counter()
+        result = compute()
+        cost = time.perf_counter() - start
+        result = freeze(result)
+        with self._lock:
+            self._data[key] = (result, cost)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def resize(self, maxsize: int) -> None:
+        if maxsize < 0:
+            raise ValueError(f"cache size must be >= 0, got {maxsize}")
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved,
+            }
+
+EVAL_CACHE = EvalCache()
+
+def cached_evaluate(
+    s: Any,
+    rules: Mapping[str, Any],
+    version: str,
+    cache: Optional[EvalCache] = None,
+) -> Mapping[str, Any]:
+    """evaluate() through a shared LRU; the result is read-only (mappingproxy/tuples).
+
+    version is the rules' rules_version(), computed once by the caller (the store
+    snapshot, RuleSet.version): hashing the rules on every call costs more than
+    evaluating them."""
+    compiled = get_compiled(rules, version)
+    idx = s.indexes if isinstance(s, ScenarioKey) else compiled.indexes(s)
+    return (cache or EVAL_CACHE).get((version, idx), lambda: compiled.evaluate_indexes(idx))
@@ -0,0 +1,137 @@
+from __future__ import annotations
+from typing import Any, Dict, Mapping, Tuple
+import numpy as np
+import plotly.graph_objects as go
+from .batch import Density
+from .compiler import MAX_VERSIONS, ZONES
+from .i18n import t
+
+GRID_STYLE = dict(width=2, color="rgba(60,60,60,0.65)", dash="dash")
+
+def _midpt(a, b):
+    return (a + b) / 2
+
+def _build_base(rules: Mapping[str, Any], lang: str) -> go.Figure:
+    # Thresholds from rules
+    z_rules = rules["zones"]
+    gxf = z_rules["green"]["max_fiscal"]
+    gys = z_rules["green"]["max_social"]
+    axf = z_rules["amber"]["max_fiscal"]
+    ays = z_rules["amber"]["max_social"]
+
+    fig = go.Figure()
+
+    def shade(x0, y0, x1, y1, color):
+        fig.add_shape(
+            type="rect",
+            x0=x0,
+            y0=y0,
+            x1=x1,
+            y1=y1,
+            line=dict(width=0),
+            fillcolor=color,
+            layer="below",
+        )
+
+    shade(0, 0, gxf, gys, "rgba(46, 204, 113, 0.14)")
+    shade(gxf, 0, axf, gys, "rgba(241, 196, 15, 0.12)")
+    shade(0, gys, gxf, ays, "rgba(241, 196, 15, 0.12)")
+    shade(gxf, gys, axf, ays, "rgba(241, 196, 15, 0.12)")
+    shade(axf, 0, 100, 100, "rgba(230, 126, 34, 0.10)")
+    shade(0, ays, 100, 100, "rgba(230, 126, 34, 0.10)")
+    shade(axf, ays, 100, 100, "rgba(231, 76, 60, 0.12)")
+
+    fig.add_shape(type="line", x0=gxf, y0=0, x1=gxf, y1=100, line=GRID_STYLE)
+    fig.add_shape(type="line", x0=axf, y0=0, x1=axf, y1=100, line=GRID_STYLE)
+    fig.add_shape(type="line", x0=0, y0=gys, x1=100, y1=gys, line=GRID_STYLE)
+    fig.add_shape(type="line", x0=0, y0=ays, x1=100, y1=ays, line=GRID_STYLE)
+
+    xL, xM, xH = _midpt(0, gxf), _midpt(gxf, axf), _midpt(axf, 100)
+    yL, yM, yH = _midpt(0, gys), _midpt(gys, ays), _midpt(ays, 100)
+
+    grid_labels = [
+        (xL, yL, ("grid.viable", "Viable")),
+        (xM, yL, ("grid.austerity", "Austerity")),
+        (xH, yL, ("grid.fiscal_stress", "Fiscal stress")),
+        (xL, yM, ("grid.social_tension", "Social tension")),
+        (xM, yM, ("grid.fragile", "Fragile")),
+        (xH, yM, ("grid.high_risk", "High risk")),
+        (xL, yH, ("grid.social_stress", "Social stress")),
+        (xM, yH, ("grid.slowdown", "Slowdown")),
+        (xH, yH, ("grid.crisis", "Crisis zone")),
+    ]
+    for x, y, (key, dflt) in grid_labels:
+        fig.add_annotation(
+            x=x,
+            y=y,
+            text=t(lang, key, default=dflt),
+            showarrow=False,
+            font=dict(size=13, color="rgba(20,20,20,0.90)"),
+            opacity=0.95,
+        )
+
+    fig.update_layout(
+        height=600,
+        margin=dict(l=45, r=45, t=10, b=45),
+        xaxis=dict(range=[0, 100], title=t(lang, "axis.fiscal", default="Fiscal stress"), zeroline=False),
+        yaxis=dict(range=[0, 100], title=t(lang, "axis.social", default="Social/growth stress"), zeroline=False),
+        showlegend=False,
+    )
+    return fig
+
+# (rules version, lang) -> validated figure dict of the static background
+_BASE: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+def compass_figure(rules: Mapping[str, Any], version: str, lang: str) -> go.Figure:
+    """Fresh figure with the zone background; add the per-scenario traces to it."""
+    key = (version, lang)
+    base = _BASE.get(key)
+    if base is None:
+        base = _BASE.setdefault(key, _build_base(rules, lang).to_dict())
+        while len(_BASE) > 2 * MAX_VERSIONS:
+            del _BASE[next(iter(_BASE))]
+    # the dict was validated when built; plotly copies it, so the cache stays untouched
+    return go.Figure(base, _validate=False)
+
+ZONE_COLORS = {"GREEN": "rgba(39,174,96,0.55)", "AMBER": "rgba(230,150,20,0.55)", "RED": "rgba(200,50,40,0.55)"}
+
+def density_trace(d: Density, color_by: str, lang: str) -> go.Scattergl:
+    """WebGL layer of every reachable position; marker area grows with the scenario count."""
+    zones = [ZONES[z] for z in d.zone]
+    size = 5 + 2.5 * np.sqrt(d.count)
+    if color_by == "flags":
+        marker = dict(
+            size=size,
+            color=d.flags_max,
+            colorscale="YlOrRd",
+            cmin=0,
+            showscale=True,
+            colorbar=dict(title=t(lang, "ui.density_flags", default="Flags"), thickness=12),
+            opacity=0.6,
+        )
+    else:
+        marker = dict(size=size, color=[ZONE_COLORS[z] for z in zones])
+    custom = np.column_stack([
+        [t(lang, "zones." + z, default=z) for z in zones],
+        d.count,
+        d.flags_min,
+        d.flags_max,
+        d.red_max,
+    ])
+    hover = (
+        f"{t(lang, 'axis.fiscal', default='Fiscal stress')}: %{{x}}/100<br>"
+        f"{t(lang, 'axis.social', default='Social/growth stress')}: %{{y}}/100<br>"
+        "%{customdata[0]}<br>"
+        f"{t(lang, 'ui.density_count', default='Scenarios')}: %{{customdata[1]}}<br>"
+        f"{t(lang, 'ui.density_flags', default='Flags')}: %{{customdata[2]}}–%{{customdata[3]}}"
+        " (RED ≤ %{customdata[4]})<extra></extra>"
+    )
+    return go.Scattergl(
+        x=d.fiscal_stress,
+        y=d.social_stress,
+        mode="markers",
+        marker=marker,
+        customdata=custom,
+        hovertemplate=hover,
+        name="Space",
+    )
@@ -1,27 +1,47 @@
 from __future__ import annotations
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
+from . import bundle
 from .load import load_json
 
-_CACHE: Dict[str, Dict[str, Any]] = {}
+FILES = {"FR": "data/i18n_fr.json", "EN": "data/i18n_en.json"}
+OTHER = {"FR": "EN", "EN": "FR"}
 
-def get_dict(lang: str) -> Dict[str, Any]:
-    lang = (lang or "FR").upper()
-    if lang not in _CACHE:
-        if lang == "EN":
-            _CACHE[lang] = load_json("data/i18n_en.json")
+def _flatten(d: Dict[str, Any], prefix: str = "", out: Dict[str, str] | None = None) -> Dict[str, str]:
+    out = {} if out is None else out
+    for k, v in d.items():
+        if isinstance(v, dict):
+            _flatten(v, f"{prefix}{k}.", out)
         else:
-            _CACHE[lang] = load_json("data/i18n_fr.json")
-    return _CACHE[lang]
+            out[f"{prefix}{k}"] = str(v)
+    return out
+
+def _load(path: str) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    # (nested, flattened), prebuilt in the data bundle when it is current
+    entry = bundle.lookup(path)
+    if entry is not None:
+        return entry.value
+    d = load_json(path)
+    return d, _flatten(d)
+
+# Both catalogs are loaded and flattened once, at import
+_LOADED = {lang: _load(path) for lang, path in FILES.items()}
+_CACHE: Dict[str, Dict[str, Any]] = {lang: d for lang, (d, _) in _LOADED.items()}
+_OWN: Dict[str, Dict[str, str]] = {lang: flat for lang, (_, flat) in _LOADED.items()}
+# lang first, then the other language, resolved once per key
+_RESOLVED: Dict[str, Dict[str, str]] = {lang: {**_OWN[OTHER[lang]], **_OWN[lang]} for lang in FILES}
+
+def _lang(lang: str) -> str:
+    return "EN" if (lang or "FR").upper() == "EN" else "FR"
+
+def get_dict(lang: str) -> Dict[str, Any]:
+    return _CACHE[_lang(lang)]
 
 def t(lang: str, key: str, default: str | None = None) -> str:
-    d = get_dict(lang)
-    cur: Any = d
-    for part in key.split("."):
-        if isinstance(cur, dict) and part in cur:
-            cur = cur[part]
-        else:
-            return default if default is not None else key
-    return str(cur)
+    lang = _lang(lang)
+    if default is None:
+        return _RESOLVED[lang].get(key, key)
+    # an explicit default is already in the right language; prefer it over the other catalog
+    return _OWN[lang].get(key, default)
 
 def opt(lang: str, group: str, code: str) -> str:
     # group examples: options.path, options.timing...
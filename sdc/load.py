@@ -1,10 +1,34 @@
+import copyreg
 import json
 from pathlib import Path
-from typing import Any, Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
 
 ROOT = Path(__file__).resolve().parents[1]
 
 def load_json(rel_path: str) -> Dict[str, Any]:
     p = ROOT / rel_path
-    with p.open("r", encoding="utf-8") as f:
+    with p.open("r", encoding="utf-8-sig") as f:
         return json.load(f)
+
+def freeze(obj: Any) -> Any:
+    # read-only view shared across sessions: dicts -> mappingproxy, lists -> tuples
+    if isinstance(obj, Mapping):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+def _proxy(d: Dict[Any, Any]) -> Mapping[Any, Any]:
+    return MappingProxyType(d)
+
+# frozen data pickles as its dict (used by the data bundle)
+copyreg.pickle(MappingProxyType, lambda m: (_proxy, (dict(m),)))
+
+def thaw(obj: Any) -> Any:
+    # plain dicts/lists again, e.g. for json.dumps
+    if isinstance(obj, Mapping):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(v) for v in obj]
+    return obj
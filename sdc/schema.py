@@ -1,5 +1,9 @@
-from pydantic import BaseModel
-from typing import Literal
+from __future__ import annotations
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Literal, Mapping, Tuple, get_args
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel as Scenario  # the real model is built by _scenario_model()
 
 Path = Literal["A_REPAY", "B_RESTRUCTURE"]
 Timing = Literal["IMMEDIATE", "GRADUAL", "DELAYED"]
@@ -8,11 +12,165 @@ FiscalIntensity = Literal["MODERATE", "HIGH", "EXTREME"]
 FinancingMix = Literal["UEMOA_HEAVY", "CONCESSIONAL_HEAVY", "HIGH_INTEREST"]
 SocialPriority = Literal["PROTECT", "NEUTRAL", "COMPRESS"]
 
-class Scenario(BaseModel):
-    name: str = "Untitled scenario"
-    path: Path = "A_REPAY"
-    timing: Timing = "IMMEDIATE"
-    perimeter: Perimeter = "EXTERNAL_ONLY"
-    fiscal_intensity: FiscalIntensity = "HIGH"
-    financing_mix: FinancingMix = "CONCESSIONAL_HEAVY"
-    social_priority: SocialPriority = "NEUTRAL"
+# Lever order follows the Scenario fields; value order follows the Literals.
+LEVERS: Dict[str, Tuple[str, ...]] = {
+    "path": get_args(Path),
+    "timing": get_args(Timing),
+    "perimeter": get_args(Perimeter),
+    "fiscal_intensity": get_args(FiscalIntensity),
+    "financing_mix": get_args(FinancingMix),
+    "social_priority": get_args(SocialPriority),
+}
+_DEFAULTS: Dict[str, str] = {
+    "path": "A_REPAY",
+    "timing": "IMMEDIATE",
+    "perimeter": "EXTERNAL_ONLY",
+    "fiscal_intensity": "HIGH",
+    "financing_mix": "CONCESSIONAL_HEAVY",
+    "social_priority": "NEUTRAL",
+}
+
+@lru_cache(maxsize=None)
+def _scenario_model() -> type:
+    # pydantic is only imported when Scenario is first used (validation, the API, the CLI);
+    # the engine, tables and pages that only need levers never pay for it
+    from pydantic import BaseModel
+
+    class Scenario(BaseModel):
+        name: str = "Untitled scenario"
+        path: Path = _DEFAULTS["path"]
+        timing: Timing = _DEFAULTS["timing"]
+        perimeter: Perimeter = _DEFAULTS["perimeter"]
+        fiscal_intensity: FiscalIntensity = _DEFAULTS["fiscal_intensity"]
+        financing_mix: FinancingMix = _DEFAULTS["financing_mix"]
+        social_priority: SocialPriority = _DEFAULTS["social_priority"]
+
+    Scenario.__module__, Scenario.__qualname__ = __name__, "Scenario"  # picklable as sdc.schema.Scenario
+    return Scenario
+
+def __getattr__(name: str) -> Any:
+    if name == "Scenario":
+        return _scenario_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+SPACE_SIZE = 1
+for _vals in LEVERS.values():
+    SPACE_SIZE *= len(_vals)
+
+_LEVER_POS = {k: i for i, k in enumerate(LEVERS)}
+_VALUE_POS = tuple({v: j for j, v in enumerate(vals)} for vals in LEVERS.values())
+_SIZES = tuple(len(vals) for vals in LEVERS.values())
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+class ScenarioKey:
+    """Hashable, interned lever combination: one small int per lever.
+
+    Lever values read like Scenario attributes (key.path, key.timing, ...), so a key
+    can be passed wherever only the levers matter. `code` is the mixed-radix integer
+    encoding (0 <= code < SPACE_SIZE); `token` is the code in base 36, for URLs.
+    """
+
+    __slots__ = ("indexes", "code")
+    _interned: Dict[int, "ScenarioKey"] = {}
+
+    def __new__(cls, indexes: Tuple[int, ...]) -> "ScenarioKey":
+        idx = tuple(indexes)
+        if len(idx) != len(_SIZES) or any(not 0 <= j < n for j, n in zip(idx, _SIZES)):
+            raise ValueError(f"invalid lever indexes {idx!r}")
+        code = 0
+        for j, n in zip(idx, _SIZES):
+            code = code * n + j
+        key = cls._interned.get(code)
+        if key is None:
+            key = object.__new__(cls)
+            object.__setattr__(key, "indexes", idx)
+            object.__setattr__(key, "code", code)
+            key = cls._interned.setdefault(code, key)
+        return key
+
+    @classmethod
+    def from_code(cls, code: int) -> "ScenarioKey":
+        if not 0 <= code < SPACE_SIZE:
+            raise ValueError(f"scenario code out of range: {code}")
+        idx = []
+        for n in reversed(_SIZES):
+            code, j = divmod(code, n)
+            idx.append(j)
+        return cls(tuple(reversed(idx)))
+
+    @classmethod
+    def from_token(cls, token: str) -> "ScenarioKey":
+        if not token or not token.isalnum() or not token.isascii():
+            raise ValueError(f"invalid scenario token: {token!r}")
+        return cls.from_code(int(token, 36))
+
+    @property
+    def token(self) -> str:
+        code, out = self.code, ""
+        while True:
+            code, d = divmod(code, 36)
+            out = _DIGITS[d] + out
+            if not code:
+                return out
+
+    @classmethod
+    def from_values(cls, values: Mapping[str, Any]) -> "ScenarioKey":
+        # missing levers take the Scenario defaults
+        idx = []
+        for lever, pos in zip(LEVERS, _VALUE_POS):
+            v = values.get(lever, _DEFAULTS[lever])
+            if v not in pos:
+                raise ValueError(f"unknown value '{v}' for lever '{lever}'")
+            idx.append(pos[v])
+        return cls(tuple(idx))
+
+    @classmethod
+    def from_scenario(cls, s: Scenario) -> "ScenarioKey":
+        idx = []
+        for lever, pos in zip(LEVERS, _VALUE_POS):
+            v = getattr(s, lever)
+            if v not in pos:
+                raise ValueError(f"unknown value '{v}' for lever '{lever}'")
+            idx.append(pos[v])
+        return cls(tuple(idx))
+
+    def values(self) -> Dict[str, str]:
+        return {lever: vals[j] for (lever, vals), j in zip(LEVERS.items(), self.indexes)}
+
+    def to_scenario(self, name: str = "Untitled scenario") -> Scenario:
+        return _scenario_model()(name=name, **self.values())
+
+    def replace(self, lever: str, value: str) -> "ScenarioKey":
+        i = _LEVER_POS.get(lever)
+        if i is None:
+            raise ValueError(f"unknown lever '{lever}'")
+        if value not in _VALUE_POS[i]:
+            raise ValueError(f"unknown value '{value}' for lever '{lever}'")
+        idx = list(self.indexes)
+        idx[i] = _VALUE_POS[i][value]
+        return ScenarioKey(tuple(idx))
+
+    def __getattr__(self, name: str) -> str:
+        i = _LEVER_POS.get(name)
+        if i is None:
+            raise AttributeError(name)
+        return LEVERS[name][self.indexes[i]]
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("ScenarioKey is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("ScenarioKey is immutable")
+
+    def __hash__(self) -> int:
+        return self.code
+
+    def __eq__(self, other: Any) -> bool:
+        return self is other or (isinstance(other, ScenarioKey) and self.code == other.code)
+
+    def __reduce__(self):
+        return ScenarioKey, (self.indexes,)
+
+    def __repr__(self) -> str:
+        return "ScenarioKey(" + ", ".join(f"{k}={v!r}" for k, v in self.values().items()) + ")"
+
@@ -0,0 +1,194 @@
+from __future__ import annotations
+import itertools
+from typing import Any, Dict, Iterator, List, NamedTuple, Sequence, Tuple
+from .compiler import CompiledRules, LEVEL_ORDER, ZONES, per_rules
+
+# "What would change the result": every scenario one (or two) lever changes away,
+# ranked by zone improvement, then RED / other flags cleared, then stress reduction.
+
+ZONE_RANK = {z: r for r, z in enumerate(ZONES)}  # GREEN=0 .. RED=2
+
+class Suggestion(NamedTuple):
+    changes: Tuple[Tuple[str, str, str], ...]  # (lever, current value, new value)
+    fiscal_stress: int
+    social_stress: int
+    zone: str
+    d_fiscal: int
+    d_social: int
+    zone_gain: int  # zones moved toward GREEN
+    red_gain: int  # RED flags cleared minus RED flags added
+    cleared: Tuple[str, ...]  # flag ids no longer triggered
+    added: Tuple[str, ...]  # flag ids newly triggered
+
+    @property
+    def rank(self) -> Tuple[int, int, int, int]:
+        return self.zone_gain, self.red_gain, len(self.cleared) - len(self.added), -(self.d_fiscal + self.d_social)
+
+def _flag_ids(c: CompiledRules, mask: int) -> Tuple[str, ...]:
+    return tuple(f["id"] for f in c.flags_of(mask))
+
+def _neighbors(sizes: Sequence[int], idx: Sequence[int], pairs: bool) -> Iterator[Tuple[Tuple[int, int], ...]]:
+    singles = [[(i, j) for j in range(n) if j != idx[i]] for i, n in enumerate(sizes)]
+    for moves in singles:
+        for m in moves:
+            yield (m,)
+    if pairs:
+        for a, b in itertools.combinations(range(len(sizes)), 2):
+            for ma in singles[a]:
+                for mb in singles[b]:
+                    yield ma, mb
+
+def neighbors(c: CompiledRules, idx: Sequence[int], pairs: bool = False, limit: int = 4) -> List[Suggestion]:
+    """Best improving neighbors of a lever combination (lever indexes, as in CompiledRules)."""
+    return list(_search(c, tuple(idx), pairs)[:limit])
+
+@per_rules(maxsize=1024)
+def _search(c: CompiledRules, idx: Tuple[int, ...], pairs: bool) -> Tuple[Suggestion, ...]:
+    red = 0
+    for b, f in enumerate(c.flags):
+        if LEVEL_ORDER.get(f["level"]) == 0:
+            red |= 1 << b
+
+    # Incremental: each neighbor is one or two evaluate_delta() moves from here
+    base = c.state(idx)
+    fiscal, social = c.clamped(base)
+    zone = c.zone(fiscal, social)
+    mask = base.mask
+
+    out: List[Suggestion] = []
+    best_single = {}
+    for moves in _neighbors(c.sizes, idx, pairs):
+        state = base
+        for i, j in moves:
+            state = c.move(state, i, j)
+        nf, ns = c.clamped(state)
+        m = state.mask
+        nz = c.zone(nf, ns)
+        s = Suggestion(
+            tuple((c.levers[i], c.values[i][idx[i]], c.values[i][j]) for i, j in moves),
+            nf,
+            ns,
+            nz,
+            nf - fiscal,
+            ns - social,
+            ZONE_RANK[zone] - ZONE_RANK[nz],
+            bin(mask & ~m & red).count("1") - bin(m & ~mask & red).count("1"),
+            _flag_ids(c, mask & ~m),
+            _flag_ids(c, m & ~mask),
+        )
+        rank = s.rank
+        if s.zone_gain < 0 or rank <= (0, 0, 0, 0):
+            continue
+        if len(moves) == 1:
+            best_single[moves[0]] = rank
+        elif rank <= max(best_single.get(moves[0], (0, 0, 0, 0)), best_single.get(moves[1], (0, 0, 0, 0))):
+            continue  # no better than one of its single changes alone
+        out.append(s)
+
+    out.sort(key=lambda s: (s.rank, -len(s.changes)), reverse=True)
+    return tuple(out)
+
+# -----------------------------
+# Pareto frontier on (fiscal_stress, social_stress)
+# -----------------------------
+class Constraints(NamedTuple):
+    """Hashable search constraints, e.g.
+    Constraints(fixed=(("path", "B_RESTRUCTURE"),), forbid_levels=("RED",),
+                outcome_not=(("financial_stability", "Systemic"),))"""
+    fixed: Tuple[Tuple[str, str], ...] = ()  # lever -> only this value
+    forbid_levels: Tuple[str, ...] = ()  # no triggered flag of these levels
+    outcome_not: Tuple[Tuple[str, str], ...] = ()  # outcome must not have this label
+
+class ParetoPoint(NamedTuple):
+    fiscal_stress: int
+    social_stress: int
+    scenarios: Tuple[Tuple[int, ...], ...]  # lever indexes reaching this point
+
+class Frontier(NamedTuple):
+    points: Tuple[ParetoPoint, ...]  # sorted by fiscal stress
+    space: int  # lever combinations allowed by the constraints
+    leaves: int  # combinations actually evaluated (the rest were pruned)
+
+def _dominated(front: Dict[Tuple[int, int], List[Tuple[int, ...]]], f: int, s: int) -> bool:
+    return any(pf <= f and ps <= s and (pf, ps) != (f, s) for pf, ps in front)
+
+def pareto(c: CompiledRules, constraints: Constraints = Constraints()) -> Frontier:
+    """Scenarios no other allowed scenario beats on both stresses (ties all kept).
+
+    Branch and bound: levers are fixed one at a time, and a branch is dropped as soon as
+    the best scores its remaining levers could still reach are dominated, or one of its
+    forbidden flags can no longer be avoided."""
+    return _pareto(c, constraints)
+
+@per_rules(maxsize=64)
+def _pareto(c: CompiledRules, cons: Constraints) -> Frontier:
+    allowed = [list(range(n)) for n in c.sizes]
+    for lever, value in cons.fixed:
+        i, j = c._lever_value(lever, value, "constraints.fixed")
+        allowed[i] = [j]
+    forbid = 0
+    for b, f in enumerate(c.flags):
+        if f["level"] in cons.forbid_levels:
+            forbid |= 1 << b
+    avoid = []
+    for name, label in cons.outcome_not:
+        if name not in c.outcome_names:
+            raise ValueError(f"constraints.outcome_not: unknown outcome '{name}'")
+        avoid.append((c.outcome_names.index(name), label))
+
+    # widest weight ranges first: bounds tighten fastest
+    order = sorted(
+        range(len(c.sizes)),
+        key=lambda i: -(max(c.fiscal_w[i][j] + c.social_w[i][j] for j in allowed[i])
+                        - min(c.fiscal_w[i][j] + c.social_w[i][j] for j in allowed[i])),
+    )
+    n = len(order)
+    # best remaining contribution from depth d on (suffix sums of per-lever minima)
+    rest_f, rest_s = [0] * (n + 1), [0] * (n + 1)
+    for d in range(n - 1, -1, -1):
+        i = order[d]
+        rest_f[d] = rest_f[d + 1] + min(c.fiscal_w[i][j] for j in allowed[i])
+        rest_s[d] = rest_s[d + 1] + min(c.social_w[i][j] for j in allowed[i])
+    # forbidden flags fully decided once the levers their 'when' reads are fixed
+    depth_of = {i: d for d, i in enumerate(order)}
+    decided = [0] * (n + 1)
+    for b, when in enumerate(c._flag_when):
+        if forbid >> b & 1:
+            d = 1 + max((depth_of[i] for i, _ in when), default=-1)
+            for k in range(d, n + 1):
+                decided[k] |= 1 << b
+
+    front: Dict[Tuple[int, int], List[Tuple[int, ...]]] = {}
+    idx = [0] * n
+    leaves = 0
+
+    def clamp(v: Any) -> int:
+        return max(0, min(100, v))
+
+    def visit(d: int, raw_f: Any, raw_s: Any, mask: int) -> None:
+        nonlocal leaves
+        if mask & decided[d]:
+            return
+        if _dominated(front, clamp(raw_f + rest_f[d]), clamp(raw_s + rest_s[d])):
+            return
+        if d == n:
+            leaves += 1
+            key = tuple(idx)
+            if any(c._outcome(o, key, mask) == label for o, label in avoid):
+                return
+            p = (clamp(raw_f), clamp(raw_s))
+            for q in [q for q in front if p[0] <= q[0] and p[1] <= q[1] and q != p]:
+                del front[q]
+            front.setdefault(p, []).append(key)
+            return
+        i = order[d]
+        for j in allowed[i]:
+            idx[i] = j
+            visit(d + 1, raw_f + c.fiscal_w[i][j], raw_s + c.social_w[i][j], mask & c.flag_masks[i][j])
+
+    visit(0, c.base_fiscal, c.base_social, c.all_flags)
+    space = 1
+    for a in allowed:
+        space *= len(a)
+    points = tuple(ParetoPoint(f, s, tuple(front[(f, s)])) for f, s in sorted(front))
+    return Frontier(points, space, leaves)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .bundle import BUNDLE
+from .load import ROOT
+
+# Process start: a profile of what a fresh interpreter spends its first second on, and a
+# prewarm that pays for it once, in the background, instead of on the first request.
+#
+#   python -m sdc.startup           import-time and prewarm profile
+#   python -m sdc.startup --json
+
+HEAVY = ("streamlit", "plotly", "pydantic", "numpy", "pandas")
+PROFILED = (
+    "sdc.schema", "sdc.engine", "sdc.store", "sdc.i18n", "sdc.versions", "sdc.search",
+    "sdc.trace_index", "sdc.batch", "sdc.figures", "sdc.ui",
+    "pydantic", "numpy", "pandas", "plotly.graph_objects", "streamlit",
+)
+
+def prewarm() -> Dict[str, float]:
+    """Load, compile and index everything the pages use; returns seconds per step.
+
+    Third-party UI packages (numpy, pandas, plotly) are left to the pages that import
+    them: importing them from another thread races with plotly's checks for a loaded
+    pandas/numpy."""
+    from .schema import _scenario_model
+    from .store import get_data
+    from .trace_index import get_index
+    from .versions import REGISTRY
+
+    steps: Dict[str, float] = {}
+
+    def step(name: str, fn: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        fn()
+        steps[name] = time.perf_counter() - start
+
+    def rulesets() -> None:
+        for name in REGISTRY.names():
+            REGISTRY.get(name).table  # compiles the rules on the way
+
+    step("data", get_data)
+    data = get_data()
+    step("i18n", lambda: import_module(".i18n", __package__))  # both catalogs, at import
+    step("rulesets", rulesets)
+    step("trace_index", lambda: get_index(data.trace, data.version, [f["id"] for f in data.rules.get("flags", ())]))
+    step("pydantic", _scenario_model)
+    return steps
+
+_STARTED = False
+_LOCK = threading.Lock()
+
+def prewarm_async() -> None:
+    """Start prewarm() in a background thread, once per process."""
+    global _STARTED
+    if _STARTED:
+        return
+    with _LOCK:
+        if _STARTED:
+            return
+        _STARTED = True
+    threading.Thread(target=prewarm, name="sdc-prewarm", daemon=True).start()
+
+# -----------------------------
+# Profile
+# -----------------------------
+def _fresh(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT, capture_output=True, text=True)
+
+def import_profile(module: str) -> Tuple[Optional[float], List[str]]:
+    """(cumulative import ms in a fresh interpreter, heavy packages it pulls in)."""
+    out = _fresh(f"import {module}", "-X", "importtime")
+    total: Optional[float] = None
+    seen = set()
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if name.split(".")[0] in HEAVY and name.split(".")[0] != module.split(".")[0]:
+            seen.add(name.split(".")[0])
+        if name == module and cumulative.strip().isdigit():
+            total = int(cumulative) / 1000
+    return total, sorted(seen)
+
+def profile() -> Dict[str, Any]:
+    imports = {}
+    for module in PROFILED:
+        ms, pulls = import_profile(module)
+        imports[module] = {"ms": ms, "pulls": pulls}
+    out = _fresh(
+        "import json, time; t = time.perf_counter(); from sdc import startup;"
+        " steps = startup.prewarm(); steps['sdc imports'] = time.perf_counter() - t - sum(steps.values());"
+        " print(json.dumps(steps))"
+    )
+    steps = json.loads(out.stdout) if out.returncode == 0 else {"error": out.stderr.strip().splitlines()[-1:]}
+    bundle = (ROOT / BUNDLE).exists()
+    return {"python": sys.version.split()[0], "bundle": bundle, "imports": imports, "prewarm": steps}
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sdc.startup", description="Import-time and startup profile of the app.")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = profile()
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"Imports (fresh interpreter, Python {report['python']})")
+    for module, r in report["imports"].items():
+        ms = "not installed" if r["ms"] is None else f"{r['ms']:8.1f} ms"
+        print(f"  {module:22} {ms:>13}   {', '.join(r['pulls']) or '-'}")
+    print(f"Prewarm (fresh interpreter, data bundle {'present' if report['bundle'] else 'absent'})")
+    for name, s in report["prewarm"].items():
+        print(f"  {name:22} {s * 1000:8.1f} ms" if isinstance(s, float) else f"  {name}: {s}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+from __future__ import annotations
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+from . import bundle
+from .compiler import rules_version
+from .load import ROOT, freeze
+from .trace_file import AnchorFile
+
+FILES: Dict[str, str] = {
+    "rules": "data/rules.json",
+    "presets": "data/presets.json",
+    "trace": "data/traceability.json",
+}
+
+# Files kept on disk and indexed instead of parsed whole (name -> loader taking the path)
+LAZY = {"trace": AnchorFile}
+
+# How often (seconds) get() stats the files; reruns in between reuse the snapshot as-is
+CHECK_INTERVAL = 1.0
+
+class DataSnapshot(NamedTuple):
+    version: str            # changes whenever any file's content changes
+    rules_version: str      # compiler.rules_version(rules): changes only when the rules do
+    rules: Mapping[str, Any]
+    presets: Mapping[str, Any]
+    trace: AnchorFile       # anchors parsed on demand
+
+class DataStore:
+    """Process-wide, read-only data files, swapped atomically when they change on disk."""
+
+    def __init__(self, files: Mapping[str, str] = FILES, interval: float = CHECK_INTERVAL):
+        self._files = dict(files)
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._stat: Dict[str, Tuple[int, int]] = {}
+        self._hash: Dict[str, str] = {}
+        self._data: Dict[str, Any] = {}
+        self._snapshot: Optional[DataSnapshot] = None
+        self._checked = 0.0
+
+    def get(self) -> DataSnapshot:
+        if self._snapshot is None or time.monotonic() - self._checked >= self._interval:
+            with self._lock:
+                if self._snapshot is None or time.monotonic() - self._checked >= self._interval:
+                    self._refresh()
+        return self._snapshot
+
+    def _refresh(self) -> None:
+        self._checked = time.monotonic()
+        changed = False
+        for name, rel in self._files.items():
+            p = ROOT / rel
+            st = p.stat()
+            sig = (st.st_mtime_ns, st.st_size)
+            if self._stat.get(name) == sig:
+                continue
+            if name not in self._hash:
+                entry = bundle.lookup(rel)  # first load: prebuilt when the file is unchanged
+                if entry is not None:
+                    if name in LAZY:
+                        entry.value.sig = entry.sig
+                    self._data[name] = entry.value
+                    self._hash[name] = entry.sha256
+                    self._stat[name] = sig
+                    changed = True
+                    continue
+            if name in LAZY:
+                try:
+                    data = LAZY[name](p)
+                except ValueError:
+                    if self._snapshot is None:
+                        raise
+                    continue
+                if self._hash.get(name) != data.digest:
+                    self._data[name] = data
+                    self._hash[name] = data.digest
+                    changed = True
+                else:
+                    self._data[name].sig = data.sig  # touched, same bytes: keep the indexed object
+                self._stat[name] = sig
+                continue
+            raw = p.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+            if self._hash.get(name) != digest:
+                try:
+                    data = freeze(json.loads(raw.decode("utf-8-sig")))
+                except ValueError:
+                    if self._snapshot is None:
+                        raise
+                    continue  # likely mid-write: keep serving the old snapshot and retry later
+                self._data[name] = data
+                self._hash[name] = digest
+                changed = True
+            self._stat[name] = sig
+
+        if changed or self._snapshot is None:
+            version = hashlib.sha256("".join(self._hash[n] for n in self._files).encode()).hexdigest()[:16]
+            rules = self._data["rules"]
+            old = self._snapshot
+            self._snapshot = DataSnapshot(
+                version=version,
+                # the same id as every cache keyed on the rules, whatever the file's formatting
+                rules_version=old.rules_version if old is not None and old.rules is rules else rules_version(rules),
+                rules=rules,
+                presets=self._data["presets"],
+                trace=self._data["trace"],
+            )
+
+    def invalidate(self) -> None:
+        """Check the files again on the next get()."""
+        self._checked = 0.0
+
+STORE = DataStore()
+
+def get_data() -> DataSnapshot:
+    return STORE.get()
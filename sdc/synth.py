@@ -0,0 +1,109 @@
+from __future__ import annotations
+import json
+import random
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+from . import engine
+
+# Synthetic rules in the rules.json format, for scaling benchmarks:
+#   n_levers levers L0..  with n_values values V0.. each,
+#   n_flags flags on 1-2 levers, n_flags outcome rules mixing if_flag / if / default.
+# Same arguments + same seed -> same rules.
+
+def synth_rules(n_levers: int = 6, n_values: int = 3, n_flags: int = 8, seed: int = 0) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    levers = {f"L{i}": [f"V{j}" for j in range(n_values)] for i in range(n_levers)}
+    names = list(levers)
+
+    def when() -> Dict[str, str]:
+        picked = rng.sample(names, min(len(names), rng.randint(1, 2)))
+        return {k: rng.choice(levers[k]) for k in picked}
+
+    weights = {
+        lever: {
+            v: {"fiscal_stress": rng.randint(-10, 15), "social_stress": rng.randint(-10, 15)}
+            for v in vals
+        }
+        for lever, vals in levers.items()
+    }
+    flags = [
+        {
+            "id": f"F{k}",
+            "level": rng.choice(("RED", "AMBER")),
+            "when": when(),
+            "title": f"Synthetic flag {k}",
+            "why": [],
+        }
+        for k in range(n_flags)
+    ]
+    outcome_rules = []
+    for k in range(n_flags):
+        logic: List[Dict[str, Any]] = []
+        for _ in range(rng.randint(1, 3)):
+            if flags and rng.random() < 0.5:
+                logic.append({"if_flag": rng.choice(flags)["id"], "label": f"O{k}_FLAG"})
+            else:
+                logic.append({"if": when(), "label": f"O{k}_IF"})
+        logic.append({"default": f"O{k}_DEFAULT"})
+        outcome_rules.append({"outcome": f"O{k}", "logic": logic})
+
+    return {
+        "scoring": {
+            "base": {"fiscal_stress": 50, "social_stress": 50},
+            "weights": weights,
+        },
+        "zones": {
+            "green": {"max_fiscal": 45, "max_social": 45},
+            "amber": {"max_fiscal": 70, "max_social": 70},
+        },
+        "flags": flags,
+        "outcome_rules": outcome_rules,
+        "baseline": {},
+    }
+
+def synth_scenarios(rules: Dict[str, Any], n: int, seed: int = 0) -> List[SimpleNamespace]:
+    """Random lever combinations for synthetic rules (attribute access, like Scenario)."""
+    rng = random.Random(seed)
+    weights = rules["scoring"]["weights"]
+    levers = {lever: list(table) for lever, table in weights.items()}
+    return [
+        SimpleNamespace(name=f"S{k}", **{lever: rng.choice(vals) for lever, vals in levers.items()})
+        for k in range(n)
+    ]
+
+# engine.compute_scores() reads the six Scenario levers by name; synthetic rules go
+# through this one instead, the same arithmetic over whatever levers the weights list.
+def compute_scores(s: Any, rules: Dict[str, Any]) -> Tuple[int, int]:
+    base = rules["scoring"]["base"]
+    fiscal = int(base["fiscal_stress"])
+    social = int(base["social_stress"])
+    for lever, table in rules["scoring"]["weights"].items():
+        w = table[getattr(s, lever)]
+        fiscal += w["fiscal_stress"]
+        social += w["social_stress"]
+    return max(0, min(100, fiscal)), max(0, min(100, social))
+
+def evaluate(s: Any, rules: Dict[str, Any]) -> Dict[str, Any]:
+    """engine.evaluate() for synthetic rules."""
+    fiscal, social = compute_scores(s, rules)
+    flags = engine.triggered_flags(s, rules)
+    return {
+        "fiscal_stress": fiscal,
+        "social_stress": social,
+        "zone": engine.compute_zone(fiscal, social, rules),
+        "flags": flags,
+        "outcomes": engine.compute_outcomes(s, flags, rules),
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a synthetic rules.json.")
+    parser.add_argument("out")
+    parser.add_argument("--levers", type=int, default=6)
+    parser.add_argument("--values", type=int, default=3)
+    parser.add_argument("--flags", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(synth_rules(args.levers, args.values, args.flags, args.seed), f, indent=2)
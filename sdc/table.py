@@ -0,0 +1,129 @@
+from __future__ import annotations
+import itertools
+import threading
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+from . import bundle
+from .compiler import MAX_VERSIONS, CompiledRules, get_compiled, rules_version
+from .engine import evaluate
+from .load import freeze, thaw
+from .schema import LEVERS, ScenarioKey
+
+# Dense tables are only built for small lever spaces (the V0 space has 324 cells)
+MAX_CELLS = 200_000
+
+Row = Tuple[int, int, str, Tuple[int, ...], Tuple[str, ...]]
+
+class ResultTable:
+    """Every lever combination of a rule set, evaluated once and indexed by lever indexes."""
+
+    def __init__(self, compiled: CompiledRules):
+        self.compiled = compiled
+        self.version = compiled.version
+        self.sizes = compiled.sizes
+
+        strides, size = [], 1
+        for n in reversed(self.sizes):
+            strides.append(size)
+            size *= n
+        if size > MAX_CELLS:
+            raise ValueError(f"lever space too large for a dense table ({size} cells)")
+        self.strides: Tuple[int, ...] = tuple(reversed(strides))
+        self.size = size
+
+        # row-major: itertools.product varies the last lever fastest
+        rows: List[Row] = []
+        for idx in itertools.product(*(range(n) for n in self.sizes)):
+            r = compiled.evaluate_indexes(idx)
+            rows.append((
+                r["fiscal_stress"],
+                r["social_stress"],
+                r["zone"],
+                tuple(compiled.flag_pos[f["id"]] for f in r["flags"]),
+                tuple(r["outcomes"][k] for k in compiled.outcome_names),
+            ))
+        self._rows = rows
+        self._results: List[Optional[Mapping[str, Any]]] = [None] * size
+        # with the schema's lever order, a ScenarioKey code is the row offset
+        self._key_order = compiled.levers == tuple(LEVERS) and compiled.values == tuple(LEVERS.values())
+
+    def offset(self, idx: Sequence[int]) -> int:
+        return sum(i * s for i, s in zip(idx, self.strides))
+
+    def cells(self):
+        return itertools.product(*(range(n) for n in self.sizes))
+
+    def row(self, idx: Sequence[int]) -> Row:
+        return self._rows[self.offset(idx)]
+
+    def lookup(self, idx: Sequence[int]) -> Mapping[str, Any]:
+        return self._result(self.offset(idx))
+
+    def _result(self, off: int) -> Mapping[str, Any]:
+        # results are shared by every session, so they are frozen (built on first use)
+        r = self._results[off]
+        if r is None:
+            r = self._results[off] = freeze(self._materialize(self._rows[off]))
+        return r
+
+    def _materialize(self, row: Row) -> Dict[str, Any]:
+        fiscal, social, zone, flags, labels = row
+        return {
+            "fiscal_stress": fiscal,
+            "social_stress": social,
+            "zone": zone,
+            "flags": [self.compiled.flags[i] for i in flags],
+            "outcomes": dict(zip(self.compiled.outcome_names, labels)),
+        }
+
+    def get(self, s: Any) -> Mapping[str, Any]:
+        if isinstance(s, ScenarioKey):
+            return self.get_key(s)
+        return self.lookup(self.compiled.indexes(s))
+
+    def get_key(self, key: ScenarioKey) -> Mapping[str, Any]:
+        if self._key_order:
+            return self._result(key.code)
+        return self.get(key.to_scenario())
+
+def verify_table(table: ResultTable, reference: Callable[[Any, Any], Dict[str, Any]] = evaluate) -> List[Tuple[int, ...]]:
+    """Compare every cell against engine.evaluate() (or reference(s, rules), e.g.
+    synth.evaluate for synthetic levers); return the mismatching indexes."""
+    c = table.compiled
+    bad = []
+    for idx in table.cells():
+        s = SimpleNamespace(**{k: c.values[i][j] for i, (k, j) in enumerate(zip(c.levers, idx))})
+        if thaw(table.lookup(idx)) != thaw(reference(s, c.rules)):
+            bad.append(idx)
+    return bad
+
+# Process-wide cache: one table per rules version
+_TABLES: Dict[str, ResultTable] = {}
+_LOCK = threading.Lock()
+
+def get_table(rules: Mapping[str, Any], version: Optional[str] = None) -> ResultTable:
+    version = version or rules_version(rules)
+    table = _TABLES.get(version)
+    if table is None:
+        with _LOCK:
+            table = _TABLES.get(version)
+            if table is None:
+                table = bundle.prebuilt("table", version) or ResultTable(get_compiled(rules, version))
+                _TABLES[version] = table
+                while len(_TABLES) > MAX_VERSIONS:
+                    del _TABLES[next(iter(_TABLES))]
+    return table
+
+def forget(version: str) -> None:
+    with _LOCK:
+        _TABLES.pop(version, None)
+
+if __name__ == "__main__":
+    from .load import load_json
+
+    t = get_table(load_json("data/rules.json"))
+    bad = verify_table(t)
+    print(f"{t.size} cells checked against evaluate(), {len(bad)} mismatch(es)")
+    for idx in bad[:20]:
+        print("  mismatch at", idx)
+    raise SystemExit(1 if bad else 0)
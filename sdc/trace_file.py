@@ -0,0 +1,130 @@
+from __future__ import annotations
+import hashlib
+import json
+import mmap
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+from .load import ROOT, freeze
+
+# traceability.json without parsing it whole: one byte-level pass records where each
+# element of the top-level "anchors" array starts and ends; an anchor is parsed only
+# when it is read, and only a few parsed anchors are kept.
+
+_TOKENS = re.compile(rb'[{}\[\]"]')
+_STRING_END = re.compile(rb'["\\]')
+CACHE_SIZE = 64
+
+class StaleTraceError(ValueError):
+    """The file changed after it was indexed; get a fresh data snapshot."""
+
+def _scan(buf: Any) -> List[Tuple[int, int]]:
+    """(start, end) byte offsets of every object in the top-level "anchors" array."""
+    spans: List[Tuple[int, int]] = []
+    depth = 0
+    key: Optional[bytes] = None  # last string seen directly inside the top-level object
+    in_anchors = False
+    start = -1
+    pos = 0
+    n = len(buf)
+    while pos < n:
+        m = _TOKENS.search(buf, pos)
+        if m is None:
+            break
+        c = m.group()
+        pos = m.end()
+        if c == b'"':
+            # skip the string, honouring escapes
+            s = pos
+            while True:
+                e = _STRING_END.search(buf, pos)
+                if e is None:
+                    raise ValueError("unterminated string")
+                pos = e.end()
+                if e.group() == b"\\":
+                    pos += 1
+                    continue
+                break
+            if depth == 1:
+                key = bytes(buf[s:pos - 1])
+        elif c in b"{[":
+            if depth == 1 and c == b"[" and key == b"anchors":
+                in_anchors = True
+            elif depth == 2 and in_anchors and c == b"{":
+                start = m.start()
+            depth += 1
+        elif c in b"}]":
+            depth -= 1
+            if depth < 0:
+                raise ValueError(f"unbalanced '{c.decode()}' at byte {m.start()}")
+            if depth == 2 and in_anchors and c == b"}":
+                spans.append((start, pos))
+            elif depth == 1 and in_anchors:
+                in_anchors = False
+    if depth != 0:
+        raise ValueError("truncated JSON document")
+    return spans
+
+class AnchorFile:
+    """Offset index over data/traceability.json; anchors are parsed on demand."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        st = self.path.stat()
+        self.sig = (st.st_mtime_ns, st.st_size)
+        digest = hashlib.sha256()
+        with self.path.open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+            self.digest = digest.hexdigest()
+            if st.st_size == 0:
+                raise ValueError("empty file")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                self.spans: Tuple[Tuple[int, int], ...] = tuple(_scan(buf))
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[int, Mapping[str, Any]]" = OrderedDict()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # offsets only (the data bundle); the lock and parsed anchors are per process.
+        # The path is kept relative to the project root, so a bundle survives the tree moving.
+        path = self.path.relative_to(ROOT) if self.path.is_relative_to(ROOT) else self.path
+        return {"path": path.as_posix(), "sig": self.sig, "digest": self.digest, "spans": self.spans}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.path = ROOT / state["path"]  # absolute paths stay as they are
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def _read(self, f, n: int) -> Any:
+        start, end = self.spans[n]
+        f.seek(start)
+        return json.loads(f.read(end - start).decode("utf-8"))
+
+    def __iter__(self) -> Iterator[Mapping[str, Any]]:
+        # one anchor in memory at a time (used to build the search index)
+        with self.path.open("rb") as f:
+            for n in range(len(self.spans)):
+                yield self._read(f, n)
+
+    def anchor(self, n: int) -> Mapping[str, Any]:
+        with self._lock:
+            a = self._cache.get(n)
+            if a is not None:
+                self._cache.move_to_end(n)
+                return a
+        st = self.path.stat()
+        if (st.st_mtime_ns, st.st_size) != self.sig:
+            raise StaleTraceError(f"{self.path.name} changed on disk")
+        with self.path.open("rb") as f:
+            a = freeze(self._read(f, n))  # shared by every session
+        with self._lock:
+            self._cache[n] = a
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return a
@@ -0,0 +1,185 @@
+from __future__ import annotations
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+from . import bundle
+from .trace_file import AnchorFile
+
+# Search index over traceability anchors: title, id, tags, report_refs and citation quotes.
+# Text is accent-folded and case-folded, so "echeances" finds "échéances".
+
+FIELD_WEIGHTS = {"id": 3.0, "title": 3.0, "tags": 3.0, "report_refs": 2.0, "quote": 1.0}
+PREFIX_WEIGHT = 0.5  # a query word matching only the start of an indexed word
+STOPWORDS = frozenset(
+    "a au aux d de des du en et l la le les ou par pour sur un une the of and or to in on for by is".split()
+)
+
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d+")
+_MARKS = re.compile(r"[\u0300-\u036f]")  # combining accents left by NFKD
+
+def fold(text: str) -> str:
+    return _MARKS.sub("", unicodedata.normalize("NFKD", text)).casefold()
+
+def tokens(text: str) -> List[str]:
+    return [w for w in _WORD.findall(fold(text).replace("_", " ")) if len(w) > 1 and w not in STOPWORDS]
+
+def pages_of(page: Any) -> Set[int]:
+    """'27–28' -> {27, 28}; '6' -> {6}; '11, 13' -> {11, 13}."""
+    nums = [int(n) for n in _NUMBER.findall(str(page))]
+    if len(nums) == 2 and re.search(r"\d\s*[–-]\s*\d", str(page)) and nums[0] <= nums[1]:
+        return set(range(nums[0], nums[1] + 1))
+    return set(nums)
+
+class Hit(NamedTuple):
+    anchor: int  # position in the anchors array
+    score: float
+    citations: Tuple[int, ...]  # citations matching the query / page filter (all if no filter)
+
+class TraceIndex:
+    """Inverted index over the traceability anchors, built once per trace data version.
+
+    Built in one pass over an AnchorFile; only light per-anchor summaries are kept, and
+    citations are read back from the file when asked for."""
+
+    def __init__(self, source: AnchorFile, flag_ids: Iterable[str] = ()):
+        self._source = source
+        self.summaries: List[Dict[str, Any]] = []
+        # term -> anchor -> weighted term frequency; quotes also per citation
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(lambda: defaultdict(float))
+        self._cite_terms: List[List[Set[str]]] = []
+        self._cite_pages: List[List[Set[int]]] = []
+        self.tags: Dict[str, Set[int]] = defaultdict(set)  # tag -> anchors
+        flag_map: Dict[str, List[str]] = defaultdict(list)
+
+        for n, a in enumerate(source):
+            self.summaries.append({
+                "id": a.get("id", ""),
+                "title": a.get("title", ""),
+                "tags": tuple(a.get("tags", ())),
+                "report_refs": tuple(a.get("report_refs", ())),
+                "citations": len(a.get("citations", ())),
+            })
+            fields = [
+                ("id", a.get("id", "")),
+                ("title", a.get("title", "")),
+                *(("tags", tag) for tag in a.get("tags", ())),
+                *(("report_refs", ref) for ref in a.get("report_refs", ())),
+            ]
+            for field, text in fields:
+                for w in tokens(text):
+                    self._postings[w][n] += FIELD_WEIGHTS[field]
+            for tag in a.get("tags", ()):
+                self.tags[tag].add(n)
+            terms, pages = [], []
+            for c in a.get("citations", ()):
+                words = set()
+                for key in ("quote_fr", "quote_en"):
+                    for w in tokens(c.get(key, "") or ""):
+                        self._postings[w][n] += FIELD_WEIGHTS["quote"]
+                        words.add(w)
+                terms.append(words)
+                pages.append(pages_of(c.get("page", "")))
+            self._cite_terms.append(terms)
+            self._cite_pages.append(pages)
+
+            # explicit anchor "flags" lists first, then an anchor with the flag's own id
+            for fid in a.get("flags", ()):
+                flag_map[fid].append(a.get("id", ""))
+
+        self.ids: Tuple[str, ...] = tuple(a["id"] for a in self.summaries)
+        for fid in flag_ids:
+            if fid in self.ids and fid not in flag_map[fid]:
+                flag_map[fid].append(fid)
+        self.flag_anchors: Dict[str, Tuple[str, ...]] = {fid: tuple(ids) for fid, ids in flag_map.items() if ids}
+        # plain dicts from here on (picklable, and frozen in size)
+        self._postings = {w: dict(p) for w, p in self._postings.items()}
+        self.tags = dict(self.tags)
+        self._vocab: List[str] = sorted(self._postings)
+        self._idf = {w: math.log(1 + len(self.summaries) / len(p)) for w, p in self._postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.summaries)
+
+    def citations(self, n: int) -> Sequence[Mapping[str, Any]]:
+        return self._source.anchor(n).get("citations", ())
+
+    def _expand(self, word: str) -> List[Tuple[str, float]]:
+        # the word itself, plus indexed words it is a prefix of (3+ letters)
+        out = [(word, 1.0)] if word in self._postings else []
+        if len(word) >= 3:
+            i = bisect.bisect_left(self._vocab, word)
+            while i < len(self._vocab) and self._vocab[i].startswith(word):
+                if self._vocab[i] != word:
+                    out.append((self._vocab[i], PREFIX_WEIGHT))
+                i += 1
+        return out
+
+    def search(
+        self,
+        query: str = "",
+        tags: Iterable[str] = (),
+        page: Optional[int] = None,
+        flag: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Hit]:
+        """Anchors matching every query word, ranked by tf-idf; an empty query keeps file order."""
+        candidates: Set[int] = set(range(len(self.summaries)))
+        for tag in tags:
+            candidates &= self.tags.get(tag, set())
+        if flag is not None:
+            wanted = set(self.flag_anchors.get(flag, ()))
+            candidates = {n for n in candidates if self.ids[n] in wanted}
+
+        words = tokens(query)
+        scores: Dict[int, float] = {n: 0.0 for n in candidates}
+        matched: List[Set[str]] = []  # per query word, the indexed words it matched
+        for w in words:
+            hits: Dict[int, float] = defaultdict(float)
+            terms = set()
+            for term, weight in self._expand(w):
+                terms.add(term)
+                for n, tf in self._postings[term].items():
+                    hits[n] = max(hits[n], weight * tf * self._idf[term])
+            scores = {n: s + hits[n] for n, s in scores.items() if n in hits}
+            matched.append(terms)
+
+        out = []
+        for n, score in scores.items():
+            cites = []
+            for k, (cterms, cpages) in enumerate(zip(self._cite_terms[n], self._cite_pages[n])):
+                if page is not None and page not in cpages:
+                    continue
+                if words and not any(cterms & terms for terms in matched):
+                    continue
+                cites.append(k)
+            if page is not None and not cites:
+                continue
+            if words and not cites:
+                cites = [k for k, cpages in enumerate(self._cite_pages[n]) if page is None or page in cpages]
+            out.append(Hit(n, score, tuple(cites)))
+        out.sort(key=lambda h: (-h.score, h.anchor) if words else h.anchor)
+        return out[:limit] if limit is not None else out
+
+    def pages(self) -> List[int]:
+        return sorted({p for pages in self._cite_pages for ps in pages for p in ps})
+
+# Process-wide cache: one index per trace data version
+_INDEXES: Dict[str, TraceIndex] = {}
+_LOCK = threading.Lock()
+
+def get_index(trace: AnchorFile, version: str, flag_ids: Iterable[str] = ()) -> TraceIndex:
+    index = _INDEXES.get(version)
+    if index is None:
+        with _LOCK:
+            index = _INDEXES.get(version)
+            if index is None:
+                index = bundle.prebuilt("index", version) or TraceIndex(trace, flag_ids)
+                _INDEXES[version] = index
+                while len(_INDEXES) > 4:
+                    del _INDEXES[next(iter(_INDEXES))]
+    return index
@@ -1,5 +1,7 @@
 import streamlit as st
 from typing import Dict, Any, List
+from .i18n import t
+from .versions import DEFAULT, REGISTRY, RuleSet
 
 def pill(label: str, kind: str = "neutral"):
     colors = {
@@ -35,3 +37,21 @@ def outcome_card(title: str, value: str, why_lines: List[str] | None = None):
             for line in why_lines:
                 st.markdown(f"- {line}")
     st.divider()
+
+def ruleset_selector(lang: str) -> RuleSet:
+    # Per-session choice of rule set; only shown when alternates exist
+    names = REGISTRY.names()
+    if st.session_state.get("ruleset") not in names:
+        st.session_state.ruleset = DEFAULT
+    if len(names) > 1:
+        st.sidebar.selectbox(
+            t(lang, "ui.ruleset", default="Rule set"),
+            names,
+            key="ruleset",
+            format_func=lambda n: t(lang, "ui.ruleset_default", default=n) if n == DEFAULT else n,
+        )
+    try:
+        return REGISTRY.get(st.session_state.ruleset)
+    except (KeyError, ValueError, OSError) as e:  # RulesError is a ValueError
+        st.sidebar.error(f"{t(lang, 'ui.ruleset_error')} ({e})")
+        return REGISTRY.get(DEFAULT)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+from . import compiler, table
+from .compiler import CompiledRules, get_compiled, rules_version
+from .load import ROOT, freeze
+from .store import CHECK_INTERVAL, get_data
+from .table import ResultTable, get_table
+
+# Named rule sets held side by side, e.g. for A/B validation of weights:
+#   "default"             -> data/rules.json (shared store, hot-reloaded)
+#   data/rulesets/X.json  -> "X" (picked up and reloaded when the file changes)
+#   register(name, rules) -> in-memory rule set
+DEFAULT = "default"
+RULESETS_DIR = "data/rulesets"
+
+# Rule sets unused for this long (seconds) drop their compiled rules and tables
+IDLE_TTL = 30 * 60
+
+class RuleSet(NamedTuple):
+    name: str
+    version: str
+    rules: Mapping[str, Any]
+
+    @property
+    def compiled(self) -> CompiledRules:
+        return get_compiled(self.rules, self.version)
+
+    @property
+    def table(self) -> ResultTable:
+        return get_table(self.rules, self.version)
+
+class RuleSetRegistry:
+    def __init__(self, directory: str = RULESETS_DIR, idle_ttl: float = IDLE_TTL):
+        self._dir = ROOT / directory
+        self._idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._files: Dict[str, Path] = {}
+        self._scanned = 0.0
+        self._registered: Dict[str, RuleSet] = {}
+        self._loaded: Dict[str, Tuple[RuleSet, Tuple[int, int]]] = {}
+        self._last_used: Dict[str, float] = {}
+
+    def _scan(self) -> None:
+        now = time.monotonic()
+        if now - self._scanned < CHECK_INTERVAL:
+            return
+        self._scanned = now
+        files = sorted(self._dir.glob("*.json")) if self._dir.is_dir() else []
+        self._files = {p.stem: p for p in files if p.stem != DEFAULT}
+
+    def names(self) -> List[str]:
+        with self._lock:
+            self._scan()
+            return [DEFAULT] + sorted(set(self._files) | set(self._registered))
+
+    def register(self, name: str, rules: Mapping[str, Any]) -> RuleSet:
+        if name == DEFAULT:
+            raise ValueError(f"'{DEFAULT}' is reserved for data/rules.json")
+        rules = freeze(rules)
+        rs = RuleSet(name, rules_version(rules), rules)
+        rs.compiled  # fail fast on malformed rules
+        with self._lock:
+            self._registered[name] = rs
+            self._last_used[name] = time.monotonic()
+        return rs
+
+    def get(self, name: str = DEFAULT) -> RuleSet:
+        now = time.monotonic()
+        self.evict_idle(now)
+        if name == DEFAULT:
+            data = get_data()
+            rs = RuleSet(DEFAULT, data.rules_version, data.rules)
+        else:
+            with self._lock:
+                rs = self._registered.get(name) or self._load_file(name)
+        rs.compiled  # compile now (cached), so a broken file fails here and not mid-render
+        with self._lock:
+            self._last_used[name] = now
+        return rs
+
+    def _load_file(self, name: str) -> RuleSet:
+        self._scan()
+        path = self._files.get(name)
+        if path is None:
+            raise KeyError(f"unknown rule set '{name}'")
+        st = path.stat()
+        sig = (st.st_mtime_ns, st.st_size)
+        cached = self._loaded.get(name)
+        if cached is not None and cached[1] == sig:
+            return cached[0]
+        rules = freeze(json.loads(path.read_bytes().decode("utf-8-sig")))
+        rs = RuleSet(name, rules_version(rules), rules)
+        self._loaded[name] = (rs, sig)
+        return rs
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        now = time.monotonic() if now is None else now
+        evicted = []
+        with self._lock:
+            dropped = []
+            for name, used in list(self._last_used.items()):
+                if name == DEFAULT or now - used <= self._idle_ttl:
+                    continue
+                del self._last_used[name]
+                rs = self._registered.get(name)
+                if rs is None:
+                    entry = self._loaded.pop(name, None)
+                    rs = entry[0] if entry else None
+                if rs is not None:
+                    dropped.append(rs.version)
+                evicted.append(name)
+            if dropped:
+                # a version is shared by rule sets with the same rules: keep those still in use
+                live = {get_data().rules_version}
+                for name in self._last_used:
+                    rs = self._registered.get(name) or (self._loaded[name][0] if name in self._loaded else None)
+                    if rs is not None:
+                        live.add(rs.version)
+                for version in set(dropped) - live:
+                    # the compiled object also holds the batches and searches derived from it
+                    compiler.forget(version)
+                    table.forget(version)
+        return evicted
+
+    def loaded(self) -> Dict[str, float]:
+        """Idle seconds per rule set in use."""
+        now = time.monotonic()
+        with self._lock:
+            return {name: now - used for name, used in self._last_used.items()}
+
+REGISTRY = RuleSetRegistry()